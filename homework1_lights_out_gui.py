@@ -1,8 +1,10 @@
 import sys
+import threading
 import tkinter
 
 # Replace STUDENTID with your student id
-import homework1_cmpsc442 as homework2
+import homework1_rxd5484 as homework2
+import search
 
 class Light(tkinter.Canvas):
 
@@ -27,13 +29,18 @@ class Light(tkinter.Canvas):
 
 class Board(tkinter.Frame):
 
-    def __init__(self, master, puzzle, rows, cols):
+    def __init__(self, master, puzzle, rows, cols, on_click=None):
 
         tkinter.Frame.__init__(self, master)
 
         self.puzzle = puzzle
         self.rows = rows
         self.cols = cols
+        self.on_click = on_click
+        # bumped whenever the board is changed from outside an animation, so a
+        # running animation sees a stale generation and stops
+        self.generation = 0
+        self.selected = None
 
         self.lights = []
         for row in range(self.rows):
@@ -46,40 +53,99 @@ class Board(tkinter.Frame):
                 row_lights.append(light)
             self.lights.append(row_lights)
 
-    def click(self, row, col):
-        self.puzzle.perform_move(row, col)
+        # what the canvases currently show, so redraws only touch changed cells
+        self.rendered = [[False] * self.cols for row in range(self.rows)]
         self.update_lights()
 
-    def update_lights(self):
-        puzzle_board = self.puzzle.get_board()
-        for row in range(self.rows):
-            for col in range(self.cols):
-                self.lights[row][col].set_state(puzzle_board[row][col])
+    def click(self, row, col):
+        self.stop_animation()
+        if self.on_click is not None:
+            self.on_click()
+        self.update_lights(self.puzzle.perform_move(row, col))
+
+    def stop_animation(self):
+        self.generation += 1
+        if self.selected is not None:
+            row, col = self.selected
+            self.lights[row][col].set_selected(False)
+            self.selected = None
+
+    def update_lights(self, changed=None):
+        # changed lists cells known to have flipped; without it, diff the
+        # whole puzzle against what was last rendered
+        if changed is None:
+            puzzle_board = self.puzzle.get_board()
+            changed = [(row, col) for row in range(self.rows) for col in range(self.cols)
+                       if puzzle_board[row][col] != self.rendered[row][col]]
+        for row, col in changed:
+            self.rendered[row][col] = not self.rendered[row][col]
+            self.lights[row][col].set_state(self.rendered[row][col])
+
+    def apply_moves(self, moves):
+        for row, col in moves:
+            self.puzzle.perform_move(row, col)
+        self.update_lights()
 
-    def animate_moves(self, moves, delay=500):
-        if moves:
+    def animate_moves(self, moves, delay=500, generation=None):
+        if generation is None:
+            generation = self.generation
+        if moves and generation == self.generation:
             row, col = moves[0]
             def stage_1():
+                if generation != self.generation:
+                    return
+                self.selected = (row, col)
                 self.lights[row][col].set_selected(True)
                 self.after(delay, stage_2)
             def stage_2():
+                if generation != self.generation:
+                    return
+                self.selected = None
                 self.lights[row][col].set_selected(False)
-                self.puzzle.perform_move(row, col)
-                self.update_lights()
+                self.update_lights(self.puzzle.perform_move(row, col))
                 self.after(delay, stage_3)
             def stage_3():
-                self.animate_moves(moves[1:], delay=delay)
+                self.animate_moves(moves[1:], delay=delay, generation=generation)
             stage_1()
 
+class SolveJob(object):
+
+    # runs find_solution on a copy of the puzzle in a worker thread; the GUI
+    # polls done and stats.expanded, and cancel() stops the search early
+
+    def __init__(self, puzzle, strategy):
+        self.stats = search.SearchStats()
+        self.result = None
+        self.done = False
+        self.thread = threading.Thread(target=self.run,
+            args=(puzzle.copy(), strategy), daemon=True)
+        self.thread.start()
+
+    def run(self, puzzle, strategy):
+        try:
+            self.result = puzzle.find_solution(strategy, self.stats)
+        except search.SearchCancelled:
+            pass
+        finally:
+            self.done = True
+
+    def cancel(self):
+        self.stats.cancel()
+
 class LightsOutGUI(tkinter.Frame):
 
-    def __init__(self, master, rows, cols):
+    POLL_DELAY = 50
+    ANIMATE_LIMIT = 25
+
+    def __init__(self, master, rows, cols, strategy="gf2"):
 
         tkinter.Frame.__init__(self, master)
 
         self.puzzle = homework2.create_puzzle(rows, cols)
+        self.strategy = strategy
+        self.job = None
 
-        self.board = Board(self, self.puzzle, rows, cols)
+        self.board = Board(self, self.puzzle, rows, cols, on_click=self.cancel_job)
         self.board.pack(side=tkinter.LEFT, padx=1, pady=1)
 
         menu = tkinter.Frame(self)
@@ -87,20 +153,56 @@ class LightsOutGUI(tkinter.Frame):
             fill=tkinter.X, padx=1, pady=1)
         tkinter.Button(menu, text="Solve", command=self.solve_click).pack(
             fill=tkinter.X, padx=1, pady=1)
+        self.instant = tkinter.BooleanVar(self, False)
+        tkinter.Checkbutton(menu, text="Instant", variable=self.instant).pack(
+            fill=tkinter.X, padx=1, pady=1)
+        self.status = tkinter.Label(menu, width=16)
+        self.status.pack(fill=tkinter.X, padx=1, pady=1)
         menu.pack(side=tkinter.RIGHT)
 
+    def cancel_job(self):
+        # also stops an animation still pressing an earlier solution
+        self.board.stop_animation()
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+            self.status.configure(text="")
+
     def scramble_click(self):
+        self.cancel_job()
         self.puzzle.scramble()
         self.board.update_lights()
 
     def solve_click(self):
-        self.board.animate_moves(self.puzzle.find_solution())
+        self.cancel_job()
+        self.job = SolveJob(self.puzzle, self.strategy)
+        self.status.configure(text="Solving...")
+        self.after(LightsOutGUI.POLL_DELAY, self.poll_job, self.job)
+
+    def poll_job(self, job):
+        if job is not self.job:
+            return
+        if not job.done:
+            self.status.configure(text="Expanded %d" % job.stats.expanded)
+            self.after(LightsOutGUI.POLL_DELAY, self.poll_job, job)
+            return
+        self.job = None
+        if job.result is None:
+            self.status.configure(text="No solution")
+        else:
+            self.status.configure(text="%d moves" % len(job.result))
+            # long solutions are applied in one redraw instead of animated
+            if self.instant.get() or len(job.result) > LightsOutGUI.ANIMATE_LIMIT:
+                self.board.apply_moves(job.result)
+            else:
+                self.board.animate_moves(job.result)
 
 if __name__ == "__main__":
     root = tkinter.Tk()
     root.title("Lights Out")
-    rows, cols = sys.argv[1:]
-    LightsOutGUI(root, int(rows), int(cols)).pack()
+    rows, cols = sys.argv[1:3]
+    strategy = sys.argv[3] if len(sys.argv) > 3 else "gf2"
+    LightsOutGUI(root, int(rows), int(cols), strategy).pack()
     root.resizable(height=False, width=False)
     root.mainloop()
  
@@ -12,6 +12,8 @@ student_name = "Rakshit Dongre"
 
 from math import factorial
 
+import search
+
 ############################################################
 # Section 1: N-Queens
 ############################################################
@@ -38,29 +40,129 @@ def n_queens_helper(n, board):
             if all(col is not board[i] and (col - board[i]) is not (len(board) - i) and (col - board[i]) != -(len(board) - i) for i in range(len(board))):
                 yield from n_queens_helper(n, board + [col])
 
-def n_queens_solutions(n):
-    yield from n_queens_helper(n, [])
-
-print(num_placements_all(4))       #1.1
-print(num_placements_one_per_row(4)) 
-
-print(n_queens_valid([0, 0]))    # 1.2
-print(n_queens_valid([0, 2]))  
-print(n_queens_valid([0, 1]))  
-print(n_queens_valid([0, 3, 1]))
-
-solutions = n_queens_solutions(4)   #1.3
-print(next(solutions)) 
-print(next(solutions))  
-print(list(n_queens_solutions(6)))
-print(len(list(n_queens_solutions(8))))  
-
+def n_queens_bitboard_helper(full, cols, ld, rd, board):
+    if cols == full:
+        yield board[:]
+    else:
+        free = full & ~(cols | ld | rd)
+        while free:
+            bit = free & -free
+            free ^= bit
+            board.append(bit.bit_length() - 1)
+            yield from n_queens_bitboard_helper(full, cols | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1, board)
+            board.pop()
+
+def n_queens_bitboard(n):
+    # columns and both diagonals are bitmasks; every first column is searched
+    # directly so boards stream out in lex order with nothing buffered (the
+    # mirror symmetry is only used for counting)
+    full = (1 << n) - 1
+    if n == 0:
+        yield []
+        return
+    for col in range(n):
+        bit = 1 << col
+        yield from n_queens_bitboard_helper(full, bit, (bit << 1) & full, bit >> 1, [col])
+
+def n_queens_count_helper(full, cols, ld, rd):
+    if cols == full:
+        return 1
+    total = 0
+    free = full & ~(cols | ld | rd)
+    while free:
+        bit = free & -free
+        free ^= bit
+        total += n_queens_count_helper(full, cols | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1)
+    return total
+
+def count_n_queens(n):
+    full = (1 << n) - 1
+    if n <= 1:
+        return 1
+    total = 0
+    for col in range(n // 2):
+        bit = 1 << col
+        total += n_queens_count_helper(full, bit, (bit << 1) & full, bit >> 1)
+    total *= 2
+    if n % 2 == 1:
+        # middle queen: the second row mirrors around the middle as well
+        mid = 1 << (n // 2)
+        ld, rd = (mid << 1) & full, mid >> 1
+        free = full & ~(mid | ld | rd) & ((1 << (n // 2)) - 1)
+        while free:
+            bit = free & -free
+            free ^= bit
+            total += 2 * n_queens_count_helper(full, mid | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1)
+    return total
 
+def n_queens_solutions(n):
+    yield from n_queens_bitboard(n)
+
+import multiprocessing
+import time
+
+def n_queens_prefixes(n, depth):
+    # valid placements of the first `depth` rows, in lex order, with their masks
+    full = (1 << n) - 1
+    def extend(cols, ld, rd, prefix):
+        if len(prefix) == depth or cols == full:
+            yield prefix, cols, ld, rd
+            return
+        free = full & ~(cols | ld | rd)
+        while free:
+            bit = free & -free
+            free ^= bit
+            yield from extend(cols | bit, ((ld | bit) << 1) & full, (rd | bit) >> 1, prefix + [bit.bit_length() - 1])
+    yield from extend(0, 0, 0, [])
+
+def n_queens_subtree(task):
+    n, prefix, cols, ld, rd = task
+    return list(n_queens_bitboard_helper((1 << n) - 1, cols, ld, rd, prefix))
+
+def n_queens_subtree_count(task):
+    n, prefix, cols, ld, rd = task
+    return n_queens_count_helper((1 << n) - 1, cols, ld, rd)
+
+def n_queens_parallel(n, workers=None, depth=2, ordered=True):
+    tasks = [(n, prefix, cols, ld, rd) for prefix, cols, ld, rd in n_queens_prefixes(n, depth)]
+    with multiprocessing.Pool(workers) as pool:
+        if ordered:
+            results = pool.imap(n_queens_subtree, tasks)
+        else:
+            results = pool.imap_unordered(n_queens_subtree, tasks)
+        for boards in results:
+            yield from boards
+
+def count_n_queens_parallel(n, workers=None, depth=2):
+    if n <= 1:
+        return 1
+    # only the left half (and middle column) of the first row is searched
+    tasks = [(n, prefix, cols, ld, rd) for prefix, cols, ld, rd in n_queens_prefixes(n, depth)
+             if 2 * prefix[0] <= n - 1]
+    weights = [1 if 2 * task[1][0] == n - 1 else 2 for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        counts = pool.map(n_queens_subtree_count, tasks)
+    return sum(w * c for w, c in zip(weights, counts))
+
+def benchmark_n_queens(ns=range(8, 16), workers=None):
+    print(f"{'n':>3} {'solutions':>10} {'serial/s':>12} {'parallel/s':>12} {'speedup':>8}")
+    for n in ns:
+        start = time.perf_counter()
+        serial = sum(1 for _ in n_queens_solutions(n))
+        t_serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = sum(1 for _ in n_queens_parallel(n, workers, ordered=False))
+        t_parallel = time.perf_counter() - start
+
+        assert serial == parallel
+        print(f"{n:>3} {serial:>10} {serial / t_serial:>12.0f} {parallel / t_parallel:>12.0f} {t_serial / t_parallel:>8.2f}")
 
 
 ############################################################
 # Section 2: Lights Out
 ############################################################
+import functools
 import random
 
 class LightsOutPuzzle(object):
@@ -77,17 +179,14 @@ class LightsOutPuzzle(object):
         
         if 0 <= row < self.rows and 0 <= col < self.cols:
             self.board[row][col] = not self.board[row][col]
+            return True
+        return False
 
     def perform_move(self, row, col):
-        
-        self.onoffs(row, col)  
-        self.onoffs(row - 1, col)  
-        self.onoffs(row + 1, col)  
-        self.onoffs(row, col - 1)  
-        self.onoffs(row, col + 1) 
-    
+        # returns the cells that were toggled so callers can redraw only those
+        return [(r, c) for r, c in ((row, col), (row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                if self.onoffs(r, c)]
 
-    
 
     def scramble(self):
         for row in range(self.rows):
@@ -109,312 +208,423 @@ class LightsOutPuzzle(object):
                 new_puzzle.perform_move(row, col)
                 yield ((row, col), new_puzzle)
     
-    def find_solution(self):
-        from collections import deque
+    def find_solution(self, strategy="gf2", stats=None):
+        if strategy == "gf2":
+            return self.find_solution_gf2(stats)
+        elif strategy == "bfs":
+            return self.find_solution_bfs(stats)
+        else:
+            return run_search(strategy, LightsOutProblem(self.rows, self.cols, self.packed_state()), stats=stats)
+
+    def packed_state(self):
+        state = 0
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if self.board[row][col]:
+                    state |= 1 << (row * self.cols + col)
+        return state
+
+    def find_solution_gf2(self, stats=None):
+        return lights_out_gf2(self.rows, self.cols, self.packed_state(), stats)
+
+    def find_solution_bfs(self, stats=None):
+        # reference search over whole puzzle objects, keyed by the board tuple
+        return search.bfs(PuzzleProblem(self),
+                          encode=lambda puzzle: tuple(map(tuple, puzzle.board)),
+                          decode=lambda board: LightsOutPuzzle([list(row) for row in board]),
+                          stats=stats)
+
+
+search_strategies = {
+    "bfs": search.bfs,
+    "bidirectional": search.bidirectional_bfs,
+    "iddfs": search.iddfs,
+    "astar": search.astar,
+}
+
+def run_search(strategy, problem, **kwargs):
+    if strategy not in search_strategies:
+        raise ValueError(f"{strategy}")
+    return search_strategies[strategy](problem, **kwargs)
+
+class PuzzleProblem(object):
+
+    def __init__(self, puzzle):
+        self.start = puzzle
+
+    def is_goal(self, puzzle):
+        return puzzle.is_solved()
+
+    def successors(self, puzzle):
+        return puzzle.successors()
+
+class LightsOutProblem(object):
+    # states are packed boards; every press undoes itself, so the moves
+    # leading into a state are the same as the moves leading out of it
+
+    def __init__(self, rows, cols, state):
+        self.cols = cols
+        self.masks = lights_out_masks(rows, cols)
+        self.start = state
+        self.goal = 0
+
+    def is_goal(self, state):
+        return state == 0
+
+    def successors(self, state):
+        for i, mask in enumerate(self.masks):
+            yield (i // self.cols, i % self.cols), state ^ mask
+
+    predecessors = successors
+
+    def heuristic(self, state):
+        # one press turns off at most five lights
+        return (bin(state).count("1") + 4) // 5
+
+@functools.lru_cache(maxsize=None)
+def lights_out_masks(rows, cols):
+    # bitmask of the cells toggled by pressing each cell, indexed row * cols + col
+    masks = []
+    for row in range(rows):
+        for col in range(cols):
+            m = 0
+            for r, c in ((row, col), (row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= r < rows and 0 <= c < cols:
+                    m |= 1 << (r * cols + c)
+            masks.append(m)
+    return tuple(masks)
+
+@functools.lru_cache(maxsize=None)
+def lights_out_cells(rows, cols):
+    # the (row, col) cells behind each mask, in the same order
+    return tuple(tuple((i // cols, i % cols) for i in range(rows * cols) if m >> i & 1)
+                 for m in lights_out_masks(rows, cols))
+
+class PackedLightsOutPuzzle(object):
+    # same interface as LightsOutPuzzle, but the board is one int with bit
+    # row * cols + col set for each light that is on
 
-        queue = deque([(self, [])])  
-        visited = set() 
-        visited.add(tuple(map(tuple, self.board)))  
+    def __init__(self, board):
+        self.rows = len(board)
+        self.cols = len(board[0]) if self.rows > 0 else 0
+        self.masks = lights_out_masks(self.rows, self.cols)
+        self.cells = lights_out_cells(self.rows, self.cols)
+        self.state = 0
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if board[row][col]:
+                    self.state |= 1 << (row * self.cols + col)
 
-        while queue:
-            present_puzzle, moves = queue.popleft()  
+    def get_board(self):
+        return [[bool(self.state >> (row * self.cols + col) & 1) for col in range(self.cols)]
+                for row in range(self.rows)]
 
-            
-            if present_puzzle.is_solved():
-                return moves  
+    def perform_move(self, row, col):
+        # like LightsOutPuzzle, only cells on the board toggle and they are returned
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            i = row * self.cols + col
+            self.state ^= self.masks[i]
+            return self.cells[i]
+        cells = [(r, c) for r, c in ((row, col), (row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                 if 0 <= r < self.rows and 0 <= c < self.cols]
+        for r, c in cells:
+            self.state ^= 1 << (r * self.cols + c)
+        return cells
 
-          
-            for move, new_puzzle in present_puzzle.successors():
-                board_tuple = tuple(map(tuple, new_puzzle.board)) 
-                if board_tuple not in visited:
-                    visited.add(board_tuple) 
-                    queue.append((new_puzzle, moves + [move])) 
+    def scramble(self):
+        for i in range(self.rows * self.cols):
+            if random.random() < 0.5:
+                self.state ^= self.masks[i]
 
-      
-        return None
+    def is_solved(self):
+        return self.state == 0
 
+    def copy(self):
+        p = PackedLightsOutPuzzle.__new__(PackedLightsOutPuzzle)
+        p.rows, p.cols, p.masks, p.cells, p.state = self.rows, self.cols, self.masks, self.cells, self.state
+        return p
 
-        
+    def successors(self):
+        for i, mask in enumerate(self.masks):
+            new_puzzle = self.copy()
+            new_puzzle.state ^= mask
+            yield ((i // self.cols, i % self.cols), new_puzzle)
+
+    def find_solution(self, strategy="gf2", stats=None):
+        if strategy == "gf2":
+            return lights_out_gf2(self.rows, self.cols, self.state, stats)
+        else:
+            return run_search(strategy, LightsOutProblem(self.rows, self.cols, self.state), stats=stats)
+
+def lights_out_gf2(rows, cols, state, stats=None):
+    # one equation per cell over GF(2): the presses touching a cell must
+    # flip it exactly state times; bit n of each row is the rhs. stats counts
+    # pivots and null-space candidates and can cancel like the searches
+    stats = stats if stats is not None else search.SearchStats()
+    n = rows * cols
+    masks = lights_out_masks(rows, cols)
+    eqs = [masks[i] | ((state >> i & 1) << n) for i in range(n)]
+
+    pivot_cols = []
+    for col in range(n):
+        stats.check()
+        stats.expanded += 1
+        r = len(pivot_cols)
+        pivot = next((k for k in range(r, n) if eqs[k] >> col & 1), None)
+        if pivot is None:
+            continue
+        eqs[r], eqs[pivot] = eqs[pivot], eqs[r]
+        for k in range(n):
+            if k != r and eqs[k] >> col & 1:
+                eqs[k] ^= eqs[r]
+        pivot_cols.append(col)
+
+    rank = len(pivot_cols)
+    if any(eqs[k] >> n & 1 for k in range(rank, n)):
+        return None
 
-    
-def create_puzzle(rows, cols):
+    particular = 0
+    for k, col in enumerate(pivot_cols):
+        if eqs[k] >> n & 1:
+            particular |= 1 << col
+
+    # every solution is particular xor a combination of the null space,
+    # walk it in gray code order to find the fewest presses
+    basis = []
+    for f in sorted(set(range(n)) - set(pivot_cols)):
+        v = 1 << f
+        for k, col in enumerate(pivot_cols):
+            if eqs[k] >> f & 1:
+                v |= 1 << col
+        basis.append(v)
+
+    best = current = particular
+    for i in range(1, 1 << len(basis)):
+        if not i & 1023:
+            stats.check()
+            stats.expanded += 1024
+        current ^= basis[(i & -i).bit_length() - 1]
+        if bin(current).count("1") < bin(best).count("1"):
+            best = current
+
+    return [(i // cols, i % cols) for i in range(n) if best >> i & 1]
+
+def create_puzzle(rows, cols, packed=False):
+    if packed:
+        return PackedLightsOutPuzzle([[False] * cols for k in range(rows)])
     return LightsOutPuzzle([[False] * cols for k in range(rows)])
 
-
-b = [[True, False], [False, True]]    #2.1
-p = LightsOutPuzzle(b)
-print(p.get_board())
-
-
-
-b = [[True, True], [True, True]]      #2.1
-p = LightsOutPuzzle(b)
-print(p.get_board())
-
-
-
-p = create_puzzle(2, 2)               #2.2
-print(p.get_board())
-
-
-p = create_puzzle(2, 3)               #2.2
-print(p.get_board())
-
-
-
-
-p = create_puzzle(3, 3)               #2.3
-p.perform_move(1, 1)
-print(p.get_board())
-
-
-
-p = create_puzzle(3, 3)               #2.3
-p.perform_move(0, 0)
-print(p.get_board())
-
-b = [[True, False], [False, True]]      #2.5
-p = LightsOutPuzzle(b)
-print(p.is_solved())
-
-
-
-b = [[False, False], [False, False]]    #2.5
-p = LightsOutPuzzle(b)
-print(p.is_solved())
-
-
-
-
-p = create_puzzle(3, 3)               #2.6
-p2 = p.copy()
-print(p.get_board() == p2.get_board()) 
-p.perform_move(1, 1)
-print(p.get_board() == p2.get_board())  
-
-
-p = create_puzzle(2, 2)               #2.7
-for move, new_p in p.successors():
-    print(move,new_p.get_board())
-
-
-for i in range(2,6):
-    p=create_puzzle(i,i+1)
-    print(len(list(p.successors())))    #2.7
-
-
-
-
-
-
-
-                                      #2.8
-puzzle = create_puzzle(3, 3)
-print("When all lights are turned off:")
-print(puzzle.get_board())
-
-
-
-puzzle.perform_move(1, 1)
-print("What happens to the board after move (1,1):")
-print(puzzle.get_board())
-
-puzzle.scramble()
-print("What happens to the board after scramble?")
-print(puzzle.get_board())
-
-
-print("Puzzle solved?")
-print(puzzle.is_solved())
-
-
-
-puzzle_copy = puzzle.copy()
-print("Copy:")
-print(puzzle_copy.get_board())
-
-
-
-print("successors:")
-for move, new_puzzle in puzzle.successors():
-    print( f"Move:{move}, Result: {new_puzzle.get_board()}")
-
-
-solution = puzzle.find_solution()
-print("Solution to solve")
-print(solution)
-
-puzzle.perform_move(0, 0)  
-print("Original board:")
-print(puzzle.get_board())
-
-print("Copied board remains unchanged:")
-print(puzzle_copy.get_board())
-
-
-#2.8 continued
-p = create_puzzle(2, 3)
-
-for row in range(2):
-    for col in range(3):
-        p.perform_move(row, col)
-
-p.find_solution()
-
-
-b = [[False, False, False],
-     [False, False, False]]
-b[0][0] = True
-p = LightsOutPuzzle(b)
-print(p.find_solution() is None) 
-
-
-solution = p.find_solution()
-print("Solution to solve the puzzle:", solution)
-
-b = [[False, False, False], [False, False, False]]
-p = LightsOutPuzzle(b)
-
-
-print("Solution to a solved puzzle:", p.find_solution())
-
-b = [[False, False, False], [True, False, False]]
-p = LightsOutPuzzle(b)
-
-
-print("Solution to a  unsolvable puzzle:", p.find_solution())
-
-
-
-
+def benchmark_lights_out(sizes=((2, 2), (2, 3), (3, 3), (3, 4), (4, 4)), seed=0):
+    import tracemalloc
+    print(f"{'size':>6} {'list s':>9} {'list KiB':>9} {'packed s':>9} {'packed KiB':>11}")
+    for rows, cols in sizes:
+        random.seed(seed)
+        p = create_puzzle(rows, cols)
+        p.scramble()
+        results = []
+        for puzzle in (p, PackedLightsOutPuzzle(p.get_board())):
+            tracemalloc.start()
+            start = time.perf_counter()
+            moves = puzzle.find_solution("bfs")
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((moves, elapsed, peak))
+        assert results[0][0] == results[1][0]
+        (_, t_list, m_list), (_, t_packed, m_packed) = results
+        print(f"{rows}x{cols:<4} {t_list:>9.4f} {m_list / 1024:>9.1f} {t_packed:>9.4f} {m_packed / 1024:>11.1f}")
 
 
 ############################################################
 # Section 3: Linear Disk Movement
 ############################################################
 
-from collections import deque
-
-def solve_identical_disks(length, n):
-    
-    present_s_disk = tuple([1] * n + [0] * (length - n))
-    goal = tuple([0] * (length - n) + [1] * n)
-
-   
-    ftier = deque([(present_s_disk, [])])  
-    v = {present_s_disk}
-
-    while ftier:
-        present_s, moves = ftier.popleft()
-
-      
-        if present_s == goal:
-            return moves
-
-        
-        for i in range(length):
-            if present_s[i] == 1: 
-                if i + 1 < length and present_s[i + 1] == 0:
-                    x = list(present_s)
-                    x[i], x[i + 1] = x[i + 1], x[i]
-                    x= tuple(x)
-                    if x not in v:
-                        v.add(x)
-                        ftier.append((x, moves + [(i, i + 1)]))
-
-                
-                if i + 2 < length and present_s[i + 2] == 0 and present_s[i + 1] == 1:
-                    x = list(present_s)
-                    x[i], x[i + 2] = x[i + 2], x[i]
-                    x = tuple(x)
-                    if x not in v:
-                        v.add(x)
-                        ftier.append((x, moves + [(i, i + 2)]))
-
-    
-    return None
-
-print(solve_identical_disks(4, 2))        #3.1
-
-print(solve_identical_disks(5, 2))
-
-print(solve_identical_disks(4,3))
-
-print(solve_identical_disks(5,3))
-
-
-
-
-   
-
-def solve_distinct_disks(length, n):
-    from collections import deque
-
-    
-    initial = tuple(range(n)) + (None,) * (length - n)
-    
-    
-    final_state = (None,) * (length - n) + tuple(reversed(range(n)))
-
-    
-    queue = deque([(initial, [])])
-    
-   
-    v = {initial}
-
-    
-    while queue:
-        current, moves = queue.popleft()
-        
-        
-        if current == final_state:
-            return moves
-        
-        
-        for i in range(length):
-            
-            if current[i] is not None:
-               
-                for direction in [-1, 1]:
-                    new_position = i + direction
-                    if 0 <= new_position < length and current[new_position] is None:
-                        y = list(current)
-                        y[i], y[new_position] = None, current[i]  
-                        y = tuple(y)
-                        if y not in v:
-                            v.add(y)
-                            queue.append((y, moves + [(i, new_position)]))
-
-                
-                for direction in [-2, 2]:
-                    new_position = i + direction
-                    mid_position = i + direction // 2
-                    if 0 <= new_position < length and current[new_position] is None and current[mid_position] is not None:
-                        y = list(current)
-                        y[i], y[new_position] = None, current[i]  
-                        y = tuple(y)
-                        if y not in v:
-                            v.add(y)
-                            queue.append((y, moves + [(i, new_position)]))
-
-    
+def identical_disks_successors(state, length):
+    # bit i is cell i; find every legal step and jump at once with shifts
+    steps = state & ~(state >> 1) & ((1 << (length - 1)) - 1)
+    jumps = state & (state >> 1) & ~(state >> 2) & ((1 << max(length - 2, 0)) - 1)
+    moves = steps | jumps
+    while moves:
+        bit = moves & -moves
+        moves ^= bit
+        i = bit.bit_length() - 1
+        if steps & bit:
+            yield (i, i + 1), state ^ (bit * 3)
+        if jumps & bit:
+            yield (i, i + 2), state ^ (bit * 5)
+
+def identical_disks_predecessors(state, length):
+    # the same moves run backwards: a disk at j came from j - 1 or j - 2
+    steps = state & ~(state << 1) & ~1
+    jumps = state & (state << 1) & ~(state << 2) & ~3
+    moves = steps | jumps
+    while moves:
+        bit = moves & -moves
+        moves ^= bit
+        j = bit.bit_length() - 1
+        if steps & bit:
+            yield (j - 1, j), state ^ (bit * 3 >> 1)
+        if jumps & bit:
+            yield (j - 2, j), state ^ (bit * 5 >> 2)
+
+class IdenticalDisksProblem(object):
+
+    def __init__(self, length, n):
+        # more disks than cells fills the row, which is already solved
+        n = min(n, length)
+        self.length = length
+        self.start = (1 << n) - 1
+        self.goal = self.start << (length - n)
+        self.goal_sum = self.position_sum(self.goal)
+
+    def is_goal(self, state):
+        return state == self.goal
+
+    def successors(self, state):
+        return identical_disks_successors(state, self.length)
+
+    def predecessors(self, state):
+        return identical_disks_predecessors(state, self.length)
+
+    def position_sum(self, state):
+        total = 0
+        while state:
+            bit = state & -state
+            state ^= bit
+            total += bit.bit_length() - 1
+        return total
+
+    def heuristic(self, state):
+        # a move shifts one disk right by at most two cells
+        return (self.goal_sum - self.position_sum(state) + 1) // 2
+
+def solve_identical_disks(length, n, count_only=False, strategy="bfs", stats=None):
+    problem = IdenticalDisksProblem(length, n)
+    if count_only:
+        return identical_disks_distance(problem.start, problem.goal, length)
+    return run_search(strategy, problem, stats=stats)
+
+class SparseMarks(dict):
+
+    def __missing__(self, state):
+        return 0
+
+def identical_disks_distance(start, goal, length):
+    # a flat byte table indexed by state while 2**length stays small
+    visited = bytearray(1 << length) if length <= 24 else SparseMarks()
+    visited[start] = 1
+    layer = [start]
+    depth = 0
+    while layer:
+        if visited[goal]:
+            return depth
+        next_layer = []
+        for state in layer:
+            for _, x in identical_disks_successors(state, length):
+                if not visited[x]:
+                    visited[x] = 1
+                    next_layer.append(x)
+        layer = next_layer
+        depth += 1
     return None
 
-    
-    
-print(solve_distinct_disks(4, 2))
-
-
-print(solve_distinct_disks(5, 2))
+def benchmark_identical_disks(lengths=range(4, 25, 2)):
+    print(f"{'length':>6} {'n':>3} {'moves':>6} {'path s':>9} {'count s':>9}")
+    for length in lengths:
+        n = length // 2
+        start = time.perf_counter()
+        moves = solve_identical_disks(length, n)
+        t_path = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count = solve_identical_disks(length, n, count_only=True)
+        t_count = time.perf_counter() - start
+
+        assert count == len(moves)
+        print(f"{length:>6} {n:>3} {count:>6} {t_path:>9.3f} {t_count:>9.3f}")
+
+
+def distinct_disks_successors(state, length):
+    for i in range(length):
+        if state[i] is not None:
+            for direction in [-1, 1]:
+                new_position = i + direction
+                if 0 <= new_position < length and state[new_position] is None:
+                    y = list(state)
+                    y[i], y[new_position] = None, state[i]
+                    yield (i, new_position), tuple(y)
+
+            for direction in [-2, 2]:
+                new_position = i + direction
+                mid_position = i + direction // 2
+                if 0 <= new_position < length and state[new_position] is None and state[mid_position] is not None:
+                    y = list(state)
+                    y[i], y[new_position] = None, state[i]
+                    yield (i, new_position), tuple(y)
+
+def distinct_disks_heuristic(state, length):
+    # every move carries one disk at most two cells, so this never overestimates
+    return sum((abs(length - 1 - d - i) + 1) // 2 for i, d in enumerate(state) if d is not None)
+
+class DistinctDisksProblem(object):
+    # visited keys pack a state into base n + 1 digits, 0 for an empty cell
+
+    def __init__(self, length, n):
+        self.length = length
+        self.n = n
+        self.start = tuple(range(n)) + (None,) * (length - n)
+        self.goal = (None,) * (length - n) + tuple(reversed(range(n)))
+
+    def is_goal(self, state):
+        return state == self.goal
+
+    def successors(self, state):
+        return distinct_disks_successors(state, self.length)
+
+    def predecessors(self, state):
+        # every move can be played backwards
+        for (i, j), previous in distinct_disks_successors(state, self.length):
+            yield (j, i), previous
+
+    def heuristic(self, state):
+        return distinct_disks_heuristic(state, self.length)
+
+    def encode(self, state):
+        key = 0
+        for d in state:
+            key = key * (self.n + 1) + (0 if d is None else d + 1)
+        return key
+
+    def decode(self, key):
+        state = []
+        for _ in range(self.length):
+            key, d = divmod(key, self.n + 1)
+            state.append(None if d == 0 else d - 1)
+        return tuple(reversed(state))
+
+def solve_distinct_disks(length, n, strategy="bfs", stats=None):
+    problem = DistinctDisksProblem(length, n)
+    if isinstance(stats, dict):
+        # stats may still be a plain dict, which gets the counters copied in
+        counters = search.SearchStats()
+        try:
+            return run_search(strategy, problem, encode=problem.encode, decode=problem.decode, stats=counters)
+        finally:
+            stats.update(expanded=counters.expanded, generated=counters.generated,
+                         peak_frontier=counters.peak_frontier, visited_bytes=counters.visited_bytes)
+    return run_search(strategy, problem, encode=problem.encode, decode=problem.decode, stats=stats)
+
+def benchmark_distinct_disks(length, n, strategies=("bfs", "bidirectional", "astar")):
+    print(f"{'strategy':>14} {'moves':>6} {'expanded':>9} {'peak':>7} {'KiB':>9} {'s':>8}")
+    for strategy in strategies:
+        stats = search.SearchStats()
+        start = time.perf_counter()
+        moves = solve_distinct_disks(length, n, strategy, stats)
+        elapsed = time.perf_counter() - start
+        print(f"{strategy:>14} {len(moves) if moves is not None else '-':>6} {stats.expanded:>9} "
+              f"{stats.peak_frontier:>7} {stats.visited_bytes / 1024:>9.1f} {elapsed:>8.3f}")
 
 
-print(solve_distinct_disks(4, 3))
-
-
-print(solve_distinct_disks(5, 3))               #3.2
-
-    
-
 ############################################################
 # Section 4: Feedback
 ############################################################
@@ -434,4 +644,82 @@ I enjoyed the puzzle-solving aspects,especially the satisfaction of seeing BFS w
  I wouldn’t change much honestly.
 """
 
-#python3 ~/Downloads/homework1_lights_out_gui.py 3 3
\ No newline at end of file
+
+############################################################
+# Command Line
+############################################################
+import argparse
+
+def queens_command(args):
+    if args.bench:
+        benchmark_n_queens(range(8, args.n + 1), args.workers)
+        return
+    print("placements:", num_placements_all(args.n))
+    print("one per row:", num_placements_one_per_row(args.n))
+    if args.list:
+        for board in n_queens_solutions(args.n):
+            print(board)
+    print("solutions:", count_n_queens(args.n))
+
+def lightsout_command(args):
+    if args.bench:
+        benchmark_lights_out(((r, c) for r in range(2, args.rows + 1) for c in range(r, args.cols + 1)))
+        return
+    random.seed(args.seed)
+    puzzle = create_puzzle(args.rows, args.cols)
+    puzzle.scramble()
+    print("board:", puzzle.get_board())
+    stats = search.SearchStats()
+    solution = puzzle.find_solution(args.strategy, stats)
+    print("solution:", solution)
+    if args.strategy != "gf2":
+        print(stats)
+
+def disks_command(args):
+    if args.bench:
+        if args.distinct:
+            benchmark_distinct_disks(args.length, args.n)
+        else:
+            benchmark_identical_disks(range(4, args.length + 1, 2))
+        return
+    stats = search.SearchStats()
+    if args.distinct:
+        print("solution:", solve_distinct_disks(args.length, args.n, args.strategy, stats))
+    else:
+        print("solution:", solve_identical_disks(args.length, args.n, strategy=args.strategy, stats=stats))
+    print(stats)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CMPSC 442 homework 1 puzzles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    queens = commands.add_parser("queens", help="N-Queens")
+    queens.add_argument("n", type=int, nargs="?", default=8)
+    queens.add_argument("--list", action="store_true", help="print every solution")
+    queens.add_argument("--workers", type=int, default=None)
+    queens.add_argument("--bench", action="store_true", help="serial vs. parallel for 8..n")
+    queens.set_defaults(run=queens_command)
+
+    lightsout = commands.add_parser("lightsout", help="scramble and solve a Lights Out board")
+    lightsout.add_argument("rows", type=int, nargs="?", default=3)
+    lightsout.add_argument("cols", type=int, nargs="?", default=3)
+    lightsout.add_argument("--strategy", default="gf2", choices=["gf2"] + list(search_strategies))
+    lightsout.add_argument("--seed", type=int, default=None)
+    lightsout.add_argument("--bench", action="store_true", help="list vs. packed BFS up to rows x cols")
+    lightsout.set_defaults(run=lightsout_command)
+
+    disks = commands.add_parser("disks", help="linear disk movement")
+    disks.add_argument("length", type=int, nargs="?", default=5)
+    disks.add_argument("n", type=int, nargs="?", default=2)
+    disks.add_argument("--distinct", action="store_true")
+    disks.add_argument("--strategy", default="bfs", choices=list(search_strategies))
+    disks.add_argument("--bench", action="store_true", help="compare strategies or lengths")
+    disks.set_defaults(run=disks_command)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
+
+#python3 ~/Downloads/homework1_lights_out_gui.py 3 3
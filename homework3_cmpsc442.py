@@ -10,51 +10,108 @@ student_name = "Rakshit Dongre"
 
 # Include your imports here, if any are used.
 #itertools
+import contextlib
+import heapq
+import itertools
+import sys
+import time
+import weakref
+from array import array
+from collections import defaultdict
+
+import sat
 
 
 ############################################################
 # Section 1: Propositional Logic
 ############################################################
 
-class Expr(object):
+class Interned(type):
+    # hash-consing: constructing an expression equal to a live one returns the
+    # existing object, so equal subexpressions are shared and their cached
+    # hashes, CNF and atom names are computed once
+    table = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args):
+        key = (cls, cls.intern_key(*args))
+        expr = Interned.table.get(key)
+        if expr is None:
+            expr = type.__call__(cls, *args)
+            Interned.table[key] = expr
+        return expr
+
+class Expr(object, metaclass=Interned):
+    __slots__ = ("hashable", "_hash", "_cnf", "_names", "__weakref__")
+
     def __hash__(self):
-        return hash((type(self).__name__, self.hashable))
+        return self._hash
+
+    def to_cnf(self):
+        if self._cnf is None:
+            self._cnf = self._to_cnf()
+        return self._cnf
+
+    def atom_names(self):
+        return set(self.names())
+
+    def names(self):
+        if self._names is None:
+            self._names = self._atom_names()
+        return self._names
+
+    def cache(self, hashable, hash_value):
+        self.hashable = hashable
+        self._hash = hash_value
+        self._cnf = None
+        self._names = None
 
 class Atom(Expr):
+    __slots__ = ("name",)
+
+    @staticmethod
+    def intern_key(name):
+        return name
+
     def __init__(self, name):
         self.name = name
-        self.hashable = name
+        self.cache(name, hash(name))
     
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
     def __eq__(self, other):
-        return isinstance(other, Atom) and self.name == other.name
+        return self is other or isinstance(other, Atom) and self.name == other.name
     def __repr__(self):
         return f"Atom({self.name})"
-    def atom_names(self):
-        return {self.name}
+    def _atom_names(self):
+        return frozenset([self.name])
     def evaluate(self, assignment):
         return assignment[self.name]
-    def to_cnf(self):
+    def _to_cnf(self):
         return self
 
 class Not(Expr):
+    __slots__ = ("arg",)
+
+    @staticmethod
+    def intern_key(arg):
+        return arg
+
     def __init__(self, arg):
         self.arg = arg
-        self.hashable = arg
+        self.cache(arg, hash(arg))
     
     def __hash__(self):
-        return hash(self.arg)
+        return self._hash
     
     def __eq__(self, other):
-        return isinstance(other, Not) and self.arg == other.arg
+        return self is other or isinstance(other, Not) and self.arg == other.arg
     def __repr__(self):
         return f"Not({repr(self.arg)})"
-    def atom_names(self):
-        return self.arg.atom_names()
+    def _atom_names(self):
+        return self.arg.names()
     def evaluate(self, assignment):
         return not self.arg.evaluate(assignment)
-    def to_cnf(self):
+    def _to_cnf(self):
         if isinstance(self.arg, Atom):
             return self  
         elif isinstance(self.arg, Not):
@@ -70,30 +127,31 @@ class Not(Expr):
             raise NotImplementedError
         
 class And(Expr):
+    __slots__ = ("conjuncts",)
+
+    @staticmethod
+    def intern_key(*conjuncts):
+        return frozenset(conjuncts)
+
     def __init__(self, *conjuncts):
         self.conjuncts = frozenset(conjuncts)
-        self.hashable = self.conjuncts
+        self.cache(self.conjuncts, hash(self.conjuncts))
     
     def __hash__(self):
-        return hash(self.conjuncts)
+        return self._hash
     
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or isinstance(other, And) and self.conjuncts == other.conjuncts
     def __repr__(self):
         s_c = sorted(self.conjuncts, key=lambda a: repr(a))
         return f"And({', '.join(repr(n) for n in s_c)})"
         
-    def atom_names(self):
-        names = set()
-
-        for conjunct in self.conjuncts:
-
-            names.update(conjunct.atom_names())
-        return names
+    def _atom_names(self):
+        return frozenset().union(*[conjunct.names() for conjunct in self.conjuncts])
         
     def evaluate(self, assignment):
         return all(c.evaluate(assignment) for c in self.conjuncts)
-    def to_cnf(self):
+    def _to_cnf(self):
         conjuncts_cnf = []
         for c in self.conjuncts:
             cnf = c.to_cnf()
@@ -105,30 +163,33 @@ class And(Expr):
         
 
 class Or(Expr):
+    __slots__ = ("disjuncts",)
+
+    @staticmethod
+    def intern_key(*disjuncts):
+        return frozenset(disjuncts)
+
     def __init__(self, *disjuncts):
         self.disjuncts = frozenset(disjuncts)
-        self.hashable = self.disjuncts
+        self.cache(self.disjuncts, hash(self.disjuncts))
     
     def __hash__(self):
-        return hash(self.disjuncts)
+        return self._hash
     def __eq__(self, other):
 
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or isinstance(other, Or) and self.disjuncts == other.disjuncts
     def __repr__(self):
         s_d = sorted(self.disjuncts, key=lambda a: repr(a))
         return f"Or({', '.join(repr(b) for b in s_d)})"
        
-    def atom_names(self):
-        names = set()
-        for disjunct in self.disjuncts:
-            names.update(disjunct.atom_names())
-        return names
+    def _atom_names(self):
+        return frozenset().union(*[disjunct.names() for disjunct in self.disjuncts])
 
         
     def evaluate(self, assignment):
         return any(d.evaluate(assignment) for d in self.disjuncts)
     
-    def to_cnf(self):
+    def _to_cnf(self):
         d = [k.to_cnf() for k in self.disjuncts]
         result = d[0]
         for disjunct in d[1:]:
@@ -201,47 +262,59 @@ def assign_or(expression_1, expression_2):
         
 
 class Implies(Expr):
+    __slots__ = ("left", "right")
+
+    @staticmethod
+    def intern_key(left, right):
+        return (left, right)
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-        self.hashable = (left, right)
+        self.cache((left, right), hash((left, right)))
     
     def __hash__(self):
-        return hash((self.left, self.right))
+        return self._hash
     def __eq__(self, other):
 
-        return isinstance(other, Implies) and self.left == other.left and self.right == other.right
+        return self is other or isinstance(other, Implies) and self.left == other.left and self.right == other.right
     def __repr__(self):
         return f"Implies({repr(self.left)}, {repr(self.right)})"
-    def atom_names(self):
-        return self.left.atom_names().union(self.right.atom_names())
+    def _atom_names(self):
+        return self.left.names() | self.right.names()
     def evaluate(self, assignment):
         return not self.left.evaluate(assignment) or self.right.evaluate(assignment)
-    def to_cnf(self):
+    def _to_cnf(self):
         return Or(Not(self.left).to_cnf(), self.right.to_cnf()).to_cnf()
 
 
 class Iff(Expr):
+    __slots__ = ("left", "right")
+
+    @staticmethod
+    def intern_key(left, right):
+        return (left, right)
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-        self.hashable = (left, right)
+        self.cache((left, right), hash((left, right)))
     
     def __hash__(self):
-        return hash(self.hashable)
+        return self._hash
     
     def __eq__(self, other):
-          return (isinstance(other, Iff) and 
+          return self is other or (isinstance(other, Iff) and 
                 (self.left == other.left and self.right == other.right or 
                  self.left == other.right and self.right == other.left))
         
     def __repr__(self):
         return f"Iff({repr(self.left)}, {repr(self.right)})"
-    def atom_names(self):
-        return self.left.atom_names().union(self.right.atom_names())
+    def _atom_names(self):
+        return self.left.names() | self.right.names()
     def evaluate(self, assignment):
         return self.left.evaluate(assignment) == self.right.evaluate(assignment)
-    def to_cnf(self):
+    def _to_cnf(self):
         l_r = Implies(self.left, self.right).to_cnf()
         r_f = Implies(self.right, self.left).to_cnf()
         return And(l_r, r_f ).to_cnf()
@@ -303,10 +376,17 @@ print(Or(And(a, b), And(c, d)).to_cnf())
  
 
 import itertools
-def satisfying_assignments(expr):
+def satisfying_assignments(expr, compiled=True):
     
     at = sorted(expr.atom_names())
-    
+    if compiled:
+        for block, low_bits, result in truth_blocks(expr, at):
+            while result:
+                bit = result & -result
+                result ^= bit
+                row = (block << low_bits) | (bit.bit_length() - 1)
+                yield {name: bool(row >> (len(at) - 1 - i) & 1) for i, name in enumerate(at)}
+        return
     
     for val in itertools.product([False, True], repeat=len(at)):
         asgn = dict(zip(at, val))
@@ -316,6 +396,81 @@ def satisfying_assignments(expr):
             
             yield asgn
 
+def count_satisfying(expr):
+    return sum(result.bit_count() for _, _, result in truth_blocks(expr, sorted(expr.atom_names())))
+
+BLOCK_BITS = 16
+
+def compile_expr(expr, atoms):
+    # flattens the expression DAG into steps in dependency order; each step is
+    # an op and either an atom position or the indexes of the steps it reads
+    index = {name: i for i, name in enumerate(atoms)}
+    slots = {}
+    program = []
+
+    def visit(e):
+        if e not in slots:
+            if isinstance(e, Atom):
+                step = ("atom", index[e.name])
+            elif isinstance(e, Not):
+                step = ("not", visit(e.arg))
+            elif isinstance(e, And):
+                step = ("and", [visit(c) for c in e.conjuncts])
+            elif isinstance(e, Or):
+                step = ("or", [visit(d) for d in e.disjuncts])
+            elif isinstance(e, Implies):
+                step = ("implies", (visit(e.left), visit(e.right)))
+            else:
+                step = ("iff", (visit(e.left), visit(e.right)))
+            slots[e] = len(program)
+            program.append(step)
+        return slots[e]
+
+    visit(expr)
+    return program
+
+def run_program(program, masks, full):
+    values = []
+    for op, arg in program:
+        if op == "atom":
+            values.append(masks[arg])
+        elif op == "not":
+            values.append(full ^ values[arg])
+        elif op == "and":
+            v = full
+            for k in arg:
+                v &= values[k]
+            values.append(v)
+        elif op == "or":
+            v = 0
+            for k in arg:
+                v |= values[k]
+            values.append(v)
+        elif op == "implies":
+            values.append((full ^ values[arg[0]]) | values[arg[1]])
+        else:
+            values.append(full ^ values[arg[0]] ^ values[arg[1]])
+    return values[-1]
+
+def truth_blocks(expr, atoms):
+    # rows are numbered as in itertools.product over atoms, so the last atom
+    # is bit 0; the low BLOCK_BITS atoms vary inside a block and each block's
+    # truth table is one int with bit r set when row r satisfies expr
+    program = compile_expr(expr, atoms)
+    n = len(atoms)
+    low_bits = min(n, BLOCK_BITS)
+    full = (1 << (1 << low_bits)) - 1
+    masks = [0] * n
+    for i in range(n):
+        p = n - 1 - i
+        if p < low_bits:
+            period = 1 << (p + 1)
+            masks[i] = full // ((1 << period) - 1) * (((1 << (1 << p)) - 1) << (1 << p))
+    for block in range(1 << (n - low_bits)):
+        for i in range(n - low_bits):
+            masks[i] = full if block >> (n - 1 - i - low_bits) & 1 else 0
+        yield block, low_bits, run_program(program, masks, full)
+
 e = Implies(Atom("a"), Atom("b"))
 a = satisfying_assignments(e)
 
@@ -329,32 +484,320 @@ e = Iff(Iff(Atom("a"), Atom("b")), Atom("c"))
 print(list(satisfying_assignments(e)))
 
 
-class KnowledgeBase:
+def sat_assignments(expr, atoms=None):
+    # models of expr found by the CDCL solver instead of by enumeration, in no
+    # particular order; atoms projects them onto a subset of expr's atoms
+    kb = KnowledgeBase("cdcl")
+    kb.tell(expr, tseitin=True)
+    return kb.models(sorted(expr.atom_names()) if atoms is None else atoms)
+
+def negate(literal):
+    return literal.arg if isinstance(literal, Not) else Not(literal)
+
+def tseitin_cnf(expr, fresh):
+    # equisatisfiable CNF: every compound subexpression gets a fresh atom x
+    # with clauses for x <-> subexpression, so the clause count stays linear;
+    # fresh() must return a new Atom on every call
+    clauses = []
+    names = {}
+
+    def clause(*literals):
+        clauses.append(Or(*literals) if len(literals) > 1 else literals[0])
+
+    def name(e):
+        if isinstance(e, Atom):
+            return e
+        if isinstance(e, Not):
+            return negate(name(e.arg))
+        if e in names:
+            return names[e]
+        x = fresh()
+        if isinstance(e, And):
+            parts = [name(c) for c in e.conjuncts]
+            for p in parts:
+                clause(Not(x), p)
+            clause(x, *[negate(p) for p in parts])
+        elif isinstance(e, Or):
+            parts = [name(d) for d in e.disjuncts]
+            clause(Not(x), *parts)
+            for p in parts:
+                clause(x, negate(p))
+        elif isinstance(e, Implies):
+            a, b = name(e.left), name(e.right)
+            clause(Not(x), negate(a), b)
+            clause(x, a)
+            clause(x, negate(b))
+        elif isinstance(e, Iff):
+            a, b = name(e.left), name(e.right)
+            clause(Not(x), negate(a), b)
+            clause(Not(x), a, negate(b))
+            clause(x, a, b)
+            clause(x, negate(a), negate(b))
+        else:
+            raise NotImplementedError
+        names[e] = x
+        return x
+
+    def top(e):
+        # conjunctions and clauses at the top level need no fresh atom
+        if isinstance(e, And):
+            for c in e.conjuncts:
+                top(c)
+        elif isinstance(e, Or) and all(isinstance(d, (Atom, Not)) for d in e.disjuncts):
+            clause(*[name(d) for d in e.disjuncts])
+        else:
+            clause(name(e))
+
+    top(expr)
+    return And(*clauses) if len(clauses) != 1 else clauses[0]
+
+class ClauseStore(object):
+    # every clause is a sorted run of signed literals in one int array and its
+    # id is its position in starts; clauses are deduplicated through a table
+    # from the hash of a run to its id, or to a list of ids on a collision
+
     def __init__(self):
+        self.literals = array("i")
+        self.starts = array("q", [0])
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, cid):
+        return self.literals[self.starts[cid]:self.starts[cid + 1]]
+
+    def __iter__(self):
+        for cid in range(len(self)):
+            yield self[cid]
+
+    def __contains__(self, clause):
+        return self.find(tuple(sorted(clause))) is not None
+
+    def find(self, run):
+        ids = self.buckets.get(hash(run))
+        for cid in ([] if ids is None else [ids] if isinstance(ids, int) else ids):
+            if tuple(self[cid]) == run:
+                return cid
+        return None
+
+    def add(self, clause):
+        # returns the clause id and whether the clause is new
+        run = tuple(sorted(clause))
+        cid = self.find(run)
+        if cid is not None:
+            return cid, False
+        cid = len(self)
+        self.literals.extend(run)
+        self.starts.append(len(self.literals))
+        h = hash(run)
+        ids = self.buckets.get(h)
+        if ids is None:
+            self.buckets[h] = cid
+        elif isinstance(ids, int):
+            self.buckets[h] = [ids, cid]
+        else:
+            ids.append(cid)
+        return cid, True
+
+    @classmethod
+    def of(cls, clauses):
+        store = cls()
+        for c in clauses:
+            store.add(c)
+        return store
+
+def deep_sizeof(obj, seen=None):
+    # getsizeof summed through containers and instance dicts, counting an
+    # object reachable along several paths once
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(obj.__dict__, seen)
+    return size
+
+class ResolutionTrace(object):
+    # filled in by a KnowledgeBase while it is tracing: one record of counts
+    # per resolution round or given clause, wall time per phase, and when
+    # proof is set one map per answered (not cached) ask from each derived
+    # clause to its two parents; proof is the map of the current ask
+
+    def __init__(self, proof=False, callback=None):
+        self.iterations = []
+        self.phases = {}
+        self.proofs = [] if proof else None
+        self.proof = None
+        self.callback = callback
+
+    def begin_ask(self):
+        if self.proofs is not None:
+            self.proof = {}
+            self.proofs.append(self.proof)
+
+    def iteration(self, **counts):
+        self.iterations.append(counts)
+        if self.callback is not None:
+            self.callback(counts)
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def derivation(self, clause=frozenset(), ask=-1):
+        # (clause, left, right) steps deriving clause in the given ask, parents
+        # first; clauses without recorded parents are premises, which includes
+        # facts saturated by an earlier ask's consistency check
+        proof = self.proofs[ask]
+        steps = []
+        done = set()
+        stack = [clause]
+        while stack:
+            c = stack[-1]
+            if c in done or c not in proof:
+                done.add(c)
+                stack.pop()
+                continue
+            left, right = proof[c]
+            pending = [p for p in (left, right) if p not in done]
+            if pending:
+                stack.extend(pending)
+            else:
+                done.add(c)
+                stack.pop()
+                steps.append((c, left, right))
+        return steps
+
+class KnowledgeBase:
+    def __init__(self, strategy="sos"):
         
-        self.facts = set()
+        self.strategy = strategy
+        self.ask_stats = {}
+        # atom ids start at 1 so a literal can carry its polarity as a sign
+        self.atom_ids = {}
+        self.atom_table = [None]
+        self.fresh_count = 0
+        # atoms of told expressions, without query-only or Tseitin atoms
+        self.told_atoms = set()
+        self.trace = None
+        # clauses are encoded once in tell and the store is their only copy;
+        # answers, the consistency check and the saturated clauses it leaves
+        # behind (another store) are kept until the next tell. The solver is
+        # built from the store when a cdcl ask or models() first needs it
+        self.clauses = ClauseStore()
+        self.solver = None
+        self.answers = {}
+        self.consistent = None
+        self.closure = None
         
     def get_facts(self):
        
-        return self.facts
+        return {self.decode_fact(c) for c in self.clauses}
         
-    def tell(self, expr):
+    def tell(self, expr, tseitin=False):
        
-        cnf_expression = expr.to_cnf()
+        self.told_atoms.update(expr.names())
+        if tseitin:
+            cnf_expression = self.timed("cnf", tseitin_cnf, expr, self.fresh_atom)
+        else:
+            cnf_expression = self.timed("cnf", expr.to_cnf)
         d = self.pull_expressions(cnf_expression)
-        self.facts.update(d)
+        new = self.timed("clauses", lambda: [c for c in self.encode_clauses(self.cfe(d)) if self.clauses.add(c)[1]])
+        # the solver only ever gains facts, so its learned clauses stay valid
+        if self.solver is not None:
+            for c in new:
+                self.solver.add_clause(c)
+        if new:
+            self.answers.clear()
+            self.consistent = None
+            self.closure = None
         
     def ask(self, query):
         
-        nq = Not(query).to_cnf()
-        qc = self.pull_clauses(nq)
-        
+        self.ask_stats = {}
+        if (self.strategy, query) in self.answers:
+            self.ask_stats["cached"] = True
+            return self.answers[(self.strategy, query)]
+        if self.trace is not None:
+            self.trace.begin_ask()
+
+        nq = self.timed("cnf", Not(query).to_cnf)
+        qc = self.timed("clauses", self.pull_clauses, nq)
         
-        e = set(self.cfe(self.facts))
-        e.update(qc)
         
-        
-        return self.resolution_algo(e)
+        if self.strategy == "sos":
+            result = self.timed("search", self.given_clause_algo, self.encode_clauses(qc))
+        elif self.strategy == "cdcl":
+            result = self.timed("search", self.cdcl_algo, self.encode_clauses(qc))
+        elif self.strategy == "saturation":
+            e = self.timed("clauses", lambda: {self.decode_clause(c) for c in self.clauses} | qc)
+            result = self.timed("search", self.resolution_algo, e)
+        else:
+            raise ValueError(f"{self.strategy}")
+        self.answers[(self.strategy, query)] = result
+        return result
+
+    @contextlib.contextmanager
+    def tracing(self, proof=False, callback=None):
+        # with kb.tracing() as trace: ... records into trace; with tracing
+        # off every hook is a single None check outside the inner loops
+        trace = ResolutionTrace(proof, callback)
+        previous, self.trace = self.trace, trace
+        try:
+            yield trace
+        finally:
+            self.trace = previous
+
+    def timed(self, phase, f, *args):
+        if self.trace is None:
+            return f(*args)
+        start = time.perf_counter()
+        try:
+            return f(*args)
+        finally:
+            self.trace.add_time(phase, time.perf_counter() - start)
+
+    def stats(self):
+        # bytes is all the KB holds between asks: the stores, atom tables,
+        # cached answers and the solver once it is built
+        return {"clauses": len(self.clauses), "literals": len(self.clauses.literals),
+                "closure_clauses": len(self.closure or ()), "bytes": deep_sizeof(self)}
+
+    def sat_solver(self):
+        if self.solver is None:
+            self.solver = sat.Solver()
+            for cid in range(len(self.clauses)):
+                self.solver.add_clause(list(self.clauses[cid]))
+        return self.solver
+
+    def ask_many(self, queries):
+        return [self.ask(query) for query in queries]
+
+    def models(self, atoms=None):
+        # streams the models of the facts projected onto atoms (by default
+        # every atom of a told expression); each model found is blocked
+        # by a clause over those atoms, guarded by a selector that is switched
+        # off when the generator finishes or is closed early
+        if atoms is None:
+            atoms = sorted(self.told_atoms)
+        ids = [self.literal(Atom(name)) for name in atoms]
+        solver = self.sat_solver()
+        for v in ids:
+            solver.new_var(v)
+        selector = len(self.atom_table)
+        self.atom_table.append(None)
+        try:
+            while solver.solve([selector]):
+                model = {name: solver.model[v] for name, v in zip(atoms, ids)}
+                yield model
+                solver.add_clause([-v if model[name] else v for name, v in zip(atoms, ids)] + [-selector])
+        finally:
+            solver.add_clause([-selector])
         
     def pull_expressions(self, expr):
         
@@ -411,22 +854,193 @@ class KnowledgeBase:
         
         new = set()
         cl_list = list(p)
+        trace = self.trace
+        resolve = self.pl_resolve
+        if trace is not None and trace.proof is not None:
+            premises = frozenset(p)
+            def resolve(hi, hj):
+                r = self.pl_resolve(hi, hj)
+                for c in r:
+                    if c not in premises:
+                        trace.proof.setdefault(c, (hi, hj))
+                return r
         
         while True:
             x = len(cl_list)
+            before = len(new)
             pairs = [(cl_list[a], cl_list[b]) for a in range(x) for b in range(a+1, x)]
             for (hi, hj) in pairs:
-                r = self.pl_resolve(hi, hj)
+                r = resolve(hi, hj)
                 if frozenset() in r:
-                    
+                    if trace is not None:
+                        trace.iteration(pairs=len(pairs), resolvents=len(new) - before, kept=len(new - p))
                     return True
                 new.update(r)
+            if trace is not None:
+                trace.iteration(pairs=len(pairs), resolvents=len(new) - before, kept=len(new - p))
             if new.issubset(p):
                 
                 return False
+            cl_list.extend(new - p)
             p.update(new)
-            cl_list.extend(new)
         
+    def given_clause_algo(self, sos):
+        # set of support: only clauses descended from the negated query are
+        # resolved, each against the clauses already processed; without a
+        # refutation the answer is still True if the facts alone are inconsistent
+        found, _ = self.refute(self.closure or self.clauses, sos)
+        return found or not self.is_consistent()
+
+    def is_consistent(self):
+        if self.consistent is None:
+            found, kept = self.refute((), self.clauses)
+            self.consistent = not found
+            # a failed refutation saturated the facts; later queries start from it
+            if self.consistent:
+                self.closure = ClauseStore.of(kept)
+        return self.consistent
+
+    def cdcl_algo(self, query):
+        # entailed exactly when facts and the negated query are unsatisfiable;
+        # the query clauses are guarded by a fresh selector that is assumed
+        # for this call and switched off afterwards
+        solver = self.sat_solver()
+        before = (solver.conflicts, solver.decisions, solver.propagations, solver.learned)
+        selector = len(self.atom_table)
+        self.atom_table.append(None)
+        for c in query:
+            solver.add_clause(list(c) + [-selector])
+        result = not solver.solve([selector])
+        solver.add_clause([-selector])
+        after = (solver.conflicts, solver.decisions, solver.propagations, solver.learned)
+        for key, b, a in zip(("conflicts", "decisions", "propagations", "learned"), before, after):
+            self.ask_stats[key] = a - b
+        return result
+
+    def refute(self, usable_clauses, sos_clauses):
+        # both arguments are iterables of literal runs, such as clause stores;
+        # clauses are only turned into frozensets for the length of the call
+        # clauses are frozensets of signed atom ids; occurs maps a literal to
+        # every kept clause containing it, resolvable only to the usable ones,
+        # so resolvable[-l] lists exactly the partners for l
+        usable, sos = set(), set()
+        occurs = defaultdict(set)
+        resolvable = defaultdict(set)
+        queue = []
+        counter = itertools.count()
+        generated = steps = scan_pairs = kept_count = 0
+        trace = self.trace
+        parents = {} if trace is not None and trace.proof is not None else None
+
+        def subsumed(r):
+            return any(c <= r for l in r for c in occurs[l])
+
+        def discard(c):
+            usable.discard(c)
+            sos.discard(c)
+            for l in c:
+                occurs[l].discard(c)
+                resolvable[l].discard(c)
+
+        def keep(r, kept):
+            # anything r subsumes must contain r's rarest literal
+            rarest = min(r, key=lambda l: len(occurs[l]))
+            for c in [c for c in occurs[rarest] if r < c]:
+                discard(c)
+            kept.add(r)
+            for l in r:
+                occurs[l].add(r)
+                if kept is usable:
+                    resolvable[l].add(r)
+            if kept is sos:
+                heapq.heappush(queue, (len(r), next(counter), r))
+
+        try:
+            for clauses, kept in ((usable_clauses, usable), (sos_clauses, sos)):
+                for c in sorted(map(frozenset, clauses), key=len):
+                    if not c:
+                        return True, set()
+                    if not self.is_tautology(c) and not subsumed(c):
+                        keep(c, kept)
+
+            while queue:
+                _, _, given = heapq.heappop(queue)
+                if given not in sos:
+                    continue
+                sos.discard(given)
+                usable.add(given)
+                for l in given:
+                    resolvable[l].add(given)
+                scan_pairs += len(usable)
+                if trace is not None:
+                    mark = (steps, generated, kept_count)
+
+                # steps counts given/partner pairs, generated every resolvent
+                # of a pair, one per clashing literal
+                partners = set()
+                for lit in given:
+                    for other in list(resolvable[-lit]):
+                        if other not in usable:
+                            continue
+                        if other not in partners:
+                            partners.add(other)
+                            steps += 1
+                        generated += 1
+                        r = (given - {lit}) | (other - {-lit})
+                        if not r:
+                            if parents is not None:
+                                parents[r] = (given, other)
+                            if trace is not None:
+                                trace.iteration(pairs=steps - mark[0], resolvents=generated - mark[1], kept=kept_count - mark[2])
+                            return True, set()
+                        if self.is_tautology(r) or subsumed(r):
+                            continue
+                        if trace is not None:
+                            kept_count += 1
+                            if parents is not None:
+                                parents.setdefault(r, (given, other))
+                        keep(r, sos)
+                if trace is not None:
+                    trace.iteration(pairs=steps - mark[0], resolvents=generated - mark[1], kept=kept_count - mark[2])
+            return False, usable
+        finally:
+            for key, value in (("generated", generated), ("steps", steps), ("scan_pairs", scan_pairs)):
+                self.ask_stats[key] = self.ask_stats.get(key, 0) + value
+            if parents:
+                decode = self.decode_clause
+                for c, (left, right) in parents.items():
+                    trace.proof[decode(c)] = (decode(left), decode(right))
+
+    def is_tautology(self, clause):
+        return any(-l in clause for l in clause)
+
+    def fresh_atom(self):
+        while True:
+            self.fresh_count += 1
+            name = f"_t{self.fresh_count}"
+            if name not in self.atom_ids:
+                self.literal(Atom(name))
+                return Atom(name)
+
+    def literal(self, expr):
+        atom, sign = (expr.arg, -1) if isinstance(expr, Not) else (expr, 1)
+        if atom.name not in self.atom_ids:
+            self.atom_ids[atom.name] = len(self.atom_table)
+            self.atom_table.append(atom.name)
+        return sign * self.atom_ids[atom.name]
+
+    def encode_clauses(self, clauses):
+        return {frozenset(self.literal(l) for l in c) for c in clauses}
+
+    def decode_literal(self, l):
+        return Atom(self.atom_table[l]) if l > 0 else Not(Atom(self.atom_table[-l]))
+
+    def decode_clause(self, run):
+        return frozenset(self.decode_literal(l) for l in run)
+
+    def decode_fact(self, run):
+        return self.decode_literal(run[0]) if len(run) == 1 else Or(*map(self.decode_literal, run))
+
     def pl_resolve(self, hi, hj):
        
         r = set()
@@ -444,6 +1058,132 @@ class KnowledgeBase:
                (isinstance(ai, Not) and isinstance(aj, Atom) and ai.arg == aj)
 
 
+def random_3cnf(n_clauses, n_atoms, rng):
+    atoms = [Atom(f"x{i}") for i in range(n_atoms)]
+    clauses = []
+    for _ in range(n_clauses):
+        lits = [a if rng.random() < 0.5 else Not(a) for a in rng.sample(atoms, 3)]
+        clauses.append(Or(*lits))
+    return atoms, clauses
+
+def benchmark_cnf(sizes=range(2, 11, 2)):
+    # an Or of n two-atom Ands or Iffs grows exponentially under to_cnf;
+    # the Tseitin form grows linearly
+    import time
+
+    print(f"{'formula':>8} {'n':>3} {'to_cnf':>8} {'s':>8} {'tseitin':>8} {'s':>8}")
+    for label in ("or-and", "or-iff"):
+        for n in sizes:
+            atoms = [Atom(f"x{i}") for i in range(2 * n)]
+            pair = And if label == "or-and" else Iff
+            expr = Or(*[pair(atoms[2 * i], atoms[2 * i + 1]) for i in range(n)])
+            counts = []
+            for convert in (lambda: expr.to_cnf(), lambda: tseitin_cnf(expr, KnowledgeBase().fresh_atom)):
+                start = time.perf_counter()
+                cnf = convert()
+                counts.append((len(KnowledgeBase().pull_expressions(cnf)), time.perf_counter() - start))
+            (n_plain, t_plain), (n_tseitin, t_tseitin) = counts
+            print(f"{label:>8} {n:>3} {n_plain:>8} {t_plain:>8.4f} {n_tseitin:>8} {t_tseitin:>8.4f}")
+
+def benchmark_resolution(sizes=(50, 100, 200, 500), seed=0):
+    # one full round of resolution over a random 3-CNF knowledge base:
+    # every clause pair through pl_resolve vs. partners from a literal index
+    import random
+    import time
+    from collections import defaultdict
+
+    rng = random.Random(seed)
+    print(f"{'clauses':>7} {'scan s':>8} {'scan pairs':>11} {'index s':>8} {'index pairs':>12} {'resolvents':>11}")
+    for n in sizes:
+        atoms, clauses = random_3cnf(n, n // 2, rng)
+        kb = KnowledgeBase()
+        for c in clauses:
+            kb.tell(c)
+        obj_clauses = [kb.decode_clause(c) for c in kb.clauses]
+        int_clauses = [frozenset(kb.literal(l) for l in c) for c in obj_clauses]
+
+        start = time.perf_counter()
+        scanned = set()
+        scan_pairs = 0
+        for i in range(len(obj_clauses)):
+            for j in range(i + 1, len(obj_clauses)):
+                scan_pairs += 1
+                scanned.update(kb.pl_resolve(obj_clauses[i], obj_clauses[j]))
+        t_scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = defaultdict(list)
+        for k, c in enumerate(int_clauses):
+            for l in c:
+                index[l].append(k)
+        indexed = set()
+        index_pairs = 0
+        for k, c in enumerate(int_clauses):
+            for l in c:
+                for m in index[-l]:
+                    if m > k:
+                        index_pairs += 1
+                        indexed.add((c - {l}) | (int_clauses[m] - {-l}))
+        t_index = time.perf_counter() - start
+
+        assert len(scanned) == len(indexed)
+        print(f"{n:>7} {t_scan:>8.4f} {scan_pairs:>11} {t_index:>8.4f} {index_pairs:>12} {len(indexed):>11}")
+
+def expr_children(expr):
+    if isinstance(expr, Not):
+        return [expr.arg]
+    if isinstance(expr, And):
+        return list(expr.conjuncts)
+    if isinstance(expr, Or):
+        return list(expr.disjuncts)
+    if isinstance(expr, (Implies, Iff)):
+        return [expr.left, expr.right]
+    return []
+
+def benchmark_expr(sizes=(1000, 5000, 20000), n_atoms=50, seed=0):
+    # a knowledge base of random implications between small conjunctions and
+    # disjunctions; the same subterms recur, so interning stores each once
+    import random
+    import time
+    import tracemalloc
+
+    rng = random.Random(seed)
+    print(f"{'implications':>12} {'tree nodes':>11} {'dag nodes':>10} {'peak KiB':>9} "
+          f"{'cnf s':>8} {'cnf again s':>12} {'names s':>8}")
+    for n in sizes:
+        tracemalloc.start()
+        atoms = [Atom(f"x{i}") for i in range(n_atoms)]
+        def term():
+            parts = [a if rng.random() < 0.5 else Not(a) for a in rng.sample(atoms, 2)]
+            return And(*parts) if rng.random() < 0.5 else Or(*parts)
+        rules = [Implies(term(), term()) for _ in range(n)]
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tree_nodes = 0
+        stack = list(rules)
+        while stack:
+            expr = stack.pop()
+            tree_nodes += 1
+            stack.extend(expr_children(expr))
+        dag = set(map(id, rules))
+        stack = list(rules)
+        while stack:
+            for child in expr_children(stack.pop()):
+                if id(child) not in dag:
+                    dag.add(id(child))
+                    stack.append(child)
+
+        timings = []
+        for convert in (Expr.to_cnf, Expr.to_cnf, Expr.atom_names):
+            start = time.perf_counter()
+            for rule in rules:
+                convert(rule)
+            timings.append(time.perf_counter() - start)
+        print(f"{n:>12} {tree_nodes:>11} {len(dag):>10} {peak // 1024:>9} "
+              f"{timings[0]:>8.4f} {timings[1]:>12.4f} {timings[2]:>8.4f}")
+
+
     
     
 
@@ -14,43 +14,98 @@ student_name = "Rakshit Dongre"
 # Section 1: Spam Filter
 ############################################################
 import email
-from email import iterators
+import locale
+import re
 import math
-from collections import defaultdict
 import os
 from collections import Counter
+import multiprocessing
+import time
+import mmap
+import struct
+import zlib
+from array import array
+from collections.abc import Mapping
+
+TOKEN_RE = re.compile(r"\S+")
+# header lines up to and including the first blank line, as the email parser
+# would read them; a match fails on anything it would treat specially
+HEADER_BLOCK_RE = re.compile(r"(?:(?:From |[\041-\071\073-\176]*:|[\t ])[^\n\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*\n)*\n")
+
+def message_bodies(email_path):
+    # the text of every non-multipart part, as body_line_iterator walks it;
+    # the file is read once and decoded as text mode would. When the headers
+    # end cleanly at a blank line and cannot make the message multipart or
+    # message/*, the payload is simply the rest of the text
+    with open(email_path, 'rb') as file:
+        data = file.read()
+    text = data.decode(locale.getpreferredencoding(False)).replace("\r\n", "\n").replace("\r", "\n")
+    
+    m = HEADER_BLOCK_RE.match(text)
+    if m:
+        head = text[:m.end()].lower()
+        if "multipart" not in head and "message/" not in head and "\nfrom " not in head:
+            return [text[m.end():]]
+    return [p.get_payload() for p in email.message_from_string(text).walk() if isinstance(p.get_payload(), str)]
 
 def load_tokens(email_path):
     
     t = []
     
-    with open(email_path, 'r') as file:
-        
-        m = email.message_from_file(file)
+    for b in message_bodies(email_path):
         
-        
-        for l in iterators.body_line_iterator(m):
-            
-            t.extend(l.split())
+        t.extend(b.split())
     
     return t
 
+def iter_tokens(email_path):
+    for b in message_bodies(email_path):
+        for m in TOKEN_RE.finditer(b):
+            yield m.group()
 
 
 
 
 
 
-def log_probs(email_paths, smoothing):
-    w_c = defaultdict(int)
-    t_w = 0
 
-    
+def count_tokens(email_paths):
+    w_c = Counter()
     for pt in email_paths:
-        a = load_tokens(pt)
-        for b in a:
-            w_c[b] += 1
-            t_w += 1
+        w_c.update(load_tokens(pt))
+    return w_c
+
+def merge_counts(shard_counts):
+    # shards arrive in file order and are merged pairwise like a binary
+    # counter, so at most log2(shards) partial counts are held and every
+    # merge puts the earlier shard on the left; the result therefore has the
+    # same words in the same first-seen order as one serial pass
+    stack = []
+    for w_c in shard_counts:
+        level = 0
+        while stack and stack[-1][0] == level:
+            _, left = stack.pop()
+            left.update(w_c)
+            w_c = left
+            level += 1
+        stack.append((level, w_c))
+    total = Counter()
+    for _, w_c in stack:
+        total.update(w_c)
+    return total
+
+def train_counts(email_paths, workers=1, shard_size=256, pool=None):
+    shards = [email_paths[i:i + shard_size] for i in range(0, len(email_paths), shard_size)]
+    if pool is not None:
+        return merge_counts(pool.imap(count_tokens, shards))
+    if workers == 1:
+        return merge_counts(map(count_tokens, shards))
+    with multiprocessing.Pool(workers) as pool:
+        return merge_counts(pool.imap(count_tokens, shards))
+
+def log_probs(email_paths, smoothing, workers=1, pool=None):
+    w_c = train_counts(email_paths, workers, pool=pool)
+    t_w = sum(w_c.values())
 
     
     v_s = len(w_c)
@@ -68,24 +123,191 @@ def log_probs(email_paths, smoothing):
 
 
 
+class CountLogProbs(Mapping):
+    # one class's log-probs derived on access from its raw token counts, with
+    # the same values and word order as log_probs; the total and vocabulary
+    # size behind the denominator are kept up to date by add and remove, and
+    # derived values are memoized until either changes them
+
+    def __init__(self, counts, smoothing):
+        self.counts = counts
+        self.total = sum(counts.values())
+        self.smoothing = smoothing
+        self.memo = {}
+
+    def denominator(self):
+        return self.total + self.smoothing * (len(self.counts) + 1)
+
+    def __getitem__(self, w):
+        p = self.memo.get(w)
+        if p is not None:
+            return p
+        if w == "<UNK>":
+            p = math.log(self.smoothing / self.denominator())
+        else:
+            c = self.counts.get(w)
+            if c is None:
+                raise KeyError(w)
+            p = math.log((c + self.smoothing) / self.denominator())
+        self.memo[w] = p
+        return p
+
+    def get(self, w, default=None):
+        # Mapping.get would raise and catch a KeyError for every unseen word
+        p = self.memo.get(w)
+        if p is not None:
+            return p
+        if w != "<UNK>" and w not in self.counts:
+            return default
+        return self[w]
+
+    def __iter__(self):
+        yield from self.counts
+        if "<UNK>" not in self.counts:
+            yield "<UNK>"
+
+    def __len__(self):
+        return len(self.counts) + ("<UNK>" not in self.counts)
+
+    def add(self, tokens):
+        self.counts.update(tokens)
+        self.total += len(tokens)
+        self.memo.clear()
+
+    def remove(self, tokens):
+        w_c = Counter(tokens)
+        if any(self.counts[w] < c for w, c in w_c.items()):
+            raise ValueError("tokens were never added")
+        for w, c in w_c.items():
+            if self.counts[w] == c:
+                del self.counts[w]
+            else:
+                self.counts[w] -= c
+        self.total -= len(tokens)
+        self.memo.clear()
+
+MODEL_MAGIC = b"SPAMFLT2"
+MODEL_HEADER = struct.Struct("=8sqdd")
+
+def word_hash(key):
+    return zlib.crc32(key)
+
+def table_size(n):
+    # a power of two at least twice the vocabulary, so probe runs stay short
+    return 1 << (2 * n).bit_length()
+
+class MappedLogProbs(Mapping):
+    # read-only view of one class's log-probs in a memory-mapped model file:
+    # a word is found through an open-addressing table of word index + 1
+    # (0 for an empty slot) keyed by word_hash, checking the stored hash
+    # before the bytes; NaN marks a word the class never saw
+
+    def __init__(self, offsets, hashes, table, mm, base, values):
+        # words are sliced straight from the mmap, whose slices are bytes,
+        # with offsets relative to base
+        self.offsets = offsets
+        self.hashes = hashes
+        self.table = table
+        self.mask = len(table) - 1
+        self.mm = mm
+        self.base = base
+        self.values = values
+        self.size = None
+
+    def word(self, i):
+        return self.mm[self.base + self.offsets[i]:self.base + self.offsets[i + 1]]
+
+    def index(self, w):
+        key = w.encode("utf-8")
+        h = word_hash(key)
+        table, mask = self.table, self.mask
+        slot = h & mask
+        while True:
+            i = table[slot] - 1
+            if i < 0:
+                return -1
+            if self.hashes[i] == h and self.word(i) == key:
+                return i
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, w):
+        i = self.index(w)
+        if i < 0 or self.values[i] != self.values[i]:
+            raise KeyError(w)
+        return self.values[i]
+
+    def get(self, w, default=None):
+        # Mapping.get goes through __getitem__ and a caught KeyError
+        i = self.index(w)
+        if i < 0:
+            return default
+        v = self.values[i]
+        return default if v != v else v
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            if self.values[i] == self.values[i]:
+                yield self.word(i).decode("utf-8")
+
+    def __len__(self):
+        if self.size is None:
+            self.size = sum(1 for v in self.values if v == v)
+        return self.size
+
 class SpamFilter(object):
 
-    def __init__(self, spam_dir, ham_dir, smoothing):
+    def __init__(self, spam_dir, ham_dir, smoothing, workers=1):
         
         spam_paths = [os.path.join(spam_dir, filename) for filename in os.listdir(spam_dir)]
         ham_paths = [os.path.join(ham_dir, filename) for filename in os.listdir(ham_dir)]
         
-        self.spam_log_probs = log_probs(spam_paths, smoothing)
-        self.ham_log_probs = log_probs(ham_paths, smoothing)
+        if workers == 1:
+            self.spam_log_probs = CountLogProbs(train_counts(spam_paths), smoothing)
+            self.ham_log_probs = CountLogProbs(train_counts(ham_paths), smoothing)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                self.spam_log_probs = CountLogProbs(train_counts(spam_paths, pool=pool), smoothing)
+                self.ham_log_probs = CountLogProbs(train_counts(ham_paths, pool=pool), smoothing)
         
         
-        num_s = len(spam_paths)
-        num_h = len(ham_paths)
-        t_f = num_s + num_h
+        self.num_s = len(spam_paths)
+        self.num_h = len(ham_paths)
+        self.update_priors()
+
+    def update_priors(self):
+        t_f = self.num_s + self.num_h
         
         
-        self.log_p_spam = math.log(num_s / t_f)
-        self.log_p_ham = math.log(num_h / t_f)
+        self.log_p_spam = math.log(self.num_s / t_f)
+        self.log_p_ham = math.log(self.num_h / t_f)
+        self.score_table = None
+
+    def update(self, email_path, is_spam):
+        self.change(email_path, is_spam, 1)
+
+    def forget(self, email_path, is_spam):
+        self.change(email_path, is_spam, -1)
+
+    def change(self, email_path, is_spam, sign):
+        l_p = self.spam_log_probs if is_spam else self.ham_log_probs
+        if not isinstance(l_p, CountLogProbs):
+            raise ValueError("a loaded model has no counts to update")
+        tok = load_tokens(email_path)
+        if sign > 0:
+            l_p.add(tok)
+        else:
+            # every check runs before anything changes, so a refused forget
+            # leaves the counts and priors as they were
+            if (self.num_s if is_spam else self.num_h) <= 1:
+                raise ValueError("cannot forget the last message of a class")
+            if l_p.total - len(tok) <= 0:
+                raise ValueError("forgetting this message would leave the class with no tokens")
+            l_p.remove(tok)
+        if is_spam:
+            self.num_s += sign
+        else:
+            self.num_h += sign
+        self.update_priors()
     
     
     def is_spam(self, email_path):
@@ -97,18 +319,123 @@ class SpamFilter(object):
         
         
         lps = self.log_p_spam  
+        unk = self.spam_log_probs["<UNK>"]
         for w, c in w_c.items():
             
-            lps += c * self.spam_log_probs.get(w, self.spam_log_probs["<UNK>"])
+            lps += c * self.spam_log_probs.get(w, unk)
         
        
         lph = self.log_p_ham 
+        unk = self.ham_log_probs["<UNK>"]
         for w, c in w_c.items():
           
-            lph += c * self.ham_log_probs.get(w, self.ham_log_probs["<UNK>"])
+            lph += c * self.ham_log_probs.get(w, unk)
         
         return lps > lph
     
+    def save(self, path):
+        # header, then n + 1 vocabulary offsets, the n word hashes and the
+        # lookup table as uint32, the spam and ham log-probs as float32 (NaN
+        # where a class lacks the word) and the sorted UTF-8 words; all in
+        # native byte order
+        words = sorted(w.encode("utf-8") for w in self.spam_log_probs.keys() | self.ham_log_probs.keys())
+        offsets = array("Q", [0])
+        for w in words:
+            offsets.append(offsets[-1] + len(w))
+        hashes = array("I", map(word_hash, words))
+        table = array("I", bytes(4 * table_size(len(words))))
+        mask = len(table) - 1
+        for i, h in enumerate(hashes):
+            slot = h & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = i + 1
+        nan = float("nan")
+        with open(path, "wb") as file:
+            file.write(MODEL_HEADER.pack(MODEL_MAGIC, len(words), self.log_p_spam, self.log_p_ham))
+            file.write(offsets.tobytes())
+            file.write(hashes.tobytes())
+            file.write(table.tobytes())
+            for l_p in (self.spam_log_probs, self.ham_log_probs):
+                file.write(array("f", [l_p.get(w.decode("utf-8"), nan) for w in words]).tobytes())
+            file.write(b"".join(words))
+
+    @classmethod
+    def load(cls, path):
+        # the file is mapped, not read, so processes loading the same model
+        # share its pages and nothing is parsed up front
+        with open(path, "rb") as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, log_p_spam, log_p_ham = MODEL_HEADER.unpack_from(mm, 0)
+        if magic != MODEL_MAGIC:
+            raise ValueError(f"{path} is not a spam filter model")
+        view = memoryview(mm)
+        start = MODEL_HEADER.size
+        offsets = view[start:start + 8 * (n + 1)].cast("Q")
+        start += 8 * (n + 1)
+        hashes = view[start:start + 4 * n].cast("I")
+        start += 4 * n
+        table = view[start:start + 4 * table_size(n)].cast("I")
+        start += 4 * table_size(n)
+        spam = view[start:start + 4 * n].cast("f")
+        ham = view[start + 4 * n:start + 8 * n].cast("f")
+
+        sf = cls.__new__(cls)
+        sf.spam_log_probs = MappedLogProbs(offsets, hashes, table, mm, start + 8 * n, spam)
+        sf.ham_log_probs = MappedLogProbs(offsets, hashes, table, mm, start + 8 * n, ham)
+        sf.log_p_spam = log_p_spam
+        sf.log_p_ham = log_p_ham
+        sf.score_table = None
+        return sf
+
+    def score_arrays(self):
+        # a token -> column lookup over both classes, with one last column for
+        # unseen words, and a (words + 1) x 2 array of spam and ham log-probs
+        # in which a word missing from a class gets that class's <UNK>
+        import numpy as np
+
+        if self.score_table is None:
+            unk = np.array([self.spam_log_probs["<UNK>"], self.ham_log_probs["<UNK>"]])
+            if isinstance(self.spam_log_probs, MappedLogProbs):
+                mapped = self.spam_log_probs
+                n = len(mapped.values)
+                weights = np.vstack([np.column_stack([np.asarray(mapped.values), np.asarray(self.ham_log_probs.values)]), unk])
+                weights = np.where(np.isnan(weights), unk, weights)
+                def lookup(w):
+                    i = mapped.index(w)
+                    return n if i < 0 else i
+            else:
+                vocab = {w: i for i, w in enumerate(self.spam_log_probs.keys() | self.ham_log_probs.keys())}
+                n = len(vocab)
+                weights = np.tile(unk, (n + 1, 1))
+                for k, l_p in enumerate((self.spam_log_probs, self.ham_log_probs)):
+                    for w, p in l_p.items():
+                        weights[vocab[w], k] = p
+                lookup = lambda w: vocab.get(w, n)
+            self.score_table = (lookup, n, weights)
+        return self.score_table
+
+    def classify_many(self, email_paths):
+        # one sparse document-term matrix for the batch times the log-prob
+        # array; returns is_spam flags and the spam minus ham log-odds margins
+        import numpy as np
+        from scipy import sparse
+
+        lookup, unk, weights = self.score_arrays()
+        indptr = [0]
+        indices = []
+        data = []
+        for pt in email_paths:
+            w_c = Counter(load_tokens(pt))
+            indices.extend(lookup(w) for w in w_c)
+            data.extend(w_c.values())
+            indptr.append(len(indices))
+        counts = sparse.csr_matrix((np.array(data, dtype=float), np.array(indices, dtype=np.intp), np.array(indptr)),
+                                   shape=(len(indptr) - 1, unk + 1))
+        scores = counts @ weights + np.array([self.log_p_spam, self.log_p_ham])
+        margins = scores[:, 0] - scores[:, 1]
+        return scores[:, 0] > scores[:, 1], margins
+
     def most_indicative_spam(self, n):
         
         i_v = {}
@@ -150,6 +477,20 @@ class SpamFilter(object):
         return sort_w[:n]
 
 
+def benchmark_training(spam_dir, ham_dir, smoothing=1e-5, workers=(1, 2, 4, 8)):
+    n = len(os.listdir(spam_dir)) + len(os.listdir(ham_dir))
+    base = None
+    print(f"{'workers':>7} {'seconds':>8} {'messages/s':>11}")
+    for k in workers:
+        start = time.perf_counter()
+        sf = SpamFilter(spam_dir, ham_dir, smoothing, workers=k)
+        elapsed = time.perf_counter() - start
+        probs = (list(sf.spam_log_probs.items()), list(sf.ham_log_probs.items()))
+        if base is None:
+            base = probs
+        assert probs == base
+        print(f"{k:>7} {elapsed:>8.3f} {n / elapsed:>11.0f}")
+
  
 
 
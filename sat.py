@@ -0,0 +1,245 @@
+"""
+Incremental CDCL satisfiability solver over signed integer literals.
+
+A clause is a list of non-zero ints where -v means "not v". Propagation
+watches two literals per clause, conflicts are analysed to the first UIP and
+the learned clause is kept, so later calls to solve() reuse earlier work.
+Assumptions are tried as the first decisions, which lets a caller guard
+temporary clauses with a selector literal instead of rebuilding the solver.
+"""
+
+import heapq
+
+
+class Solver(object):
+
+    def __init__(self):
+        self.ok = True
+        # positions 0 and 1 of each clause are its watched literals, and
+        # position 0 is the implied literal while the clause is a reason
+        self.clauses = []
+        self.watches = {}
+        self.value = {}
+        self.level = {}
+        self.reason = {}
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.activity = {}
+        # heap of (-activity, var) for choosing decisions; entries are pushed
+        # when a var is unassigned and dropped lazily once stale, so vars
+        # fixed at level 0, like retired selectors, stop costing anything
+        self.order = []
+        self.phase = {}
+        self.bump = 1.0
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.learned = 0
+
+    def new_var(self, var):
+        if var not in self.activity:
+            self.activity[var] = 0.0
+            heapq.heappush(self.order, (-0.0, var))
+            self.phase[var] = False
+            self.watches[var] = []
+            self.watches[-var] = []
+
+    def lit_value(self, lit):
+        value = self.value.get(abs(lit))
+        if value is None:
+            return None
+        return value if lit > 0 else not value
+
+    def assign(self, lit, reason):
+        var = abs(lit)
+        self.value[var] = lit > 0
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def cancel_until(self, level):
+        if len(self.trail_lim) > level:
+            start = self.trail_lim[level]
+            for lit in self.trail[start:]:
+                var = abs(lit)
+                self.phase[var] = lit > 0
+                del self.value[var]
+                del self.level[var]
+                del self.reason[var]
+                heapq.heappush(self.order, (-self.activity[var], var))
+            del self.trail[start:]
+            del self.trail_lim[level:]
+            self.qhead = len(self.trail)
+            if len(self.order) > 2 * len(self.activity):
+                self.rebuild_order()
+
+    def rebuild_order(self):
+        self.order = [(-a, v) for v, a in self.activity.items() if v not in self.value]
+        heapq.heapify(self.order)
+
+    def add_clause(self, lits):
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        lits = set(lits)
+        clause = []
+        for lit in lits:
+            self.new_var(abs(lit))
+            value = self.lit_value(lit)
+            if -lit in lits or value is True:
+                return True
+            if value is None:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def propagate(self):
+        # returns the index of a falsified clause, or None
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches[false_lit]
+            kept = []
+            conflict = None
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                i += 1
+                clause = self.clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.lit_value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    if self.lit_value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.lit_value(clause[0]) is False:
+                        conflict = index
+                        kept.extend(watchers[i:])
+                        break
+                    self.assign(clause[0], index)
+                    self.propagations += 1
+            self.watches[false_lit] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        # walk the trail backwards resolving reasons until one literal of the
+        # current level remains; returns the learned clause and backjump level
+        learnt = [None]
+        seen = set()
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        level = len(self.trail_lim)
+        clause = self.clauses[conflict]
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump_var(var)
+                    if self.level[var] == level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reason[abs(lit)]]
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        k = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[k] = learnt[k], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump_var(self, var):
+        self.activity[var] += self.bump
+        if self.activity[var] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.bump *= 1e-100
+            self.rebuild_order()
+
+    def pick_branch(self):
+        order = self.order
+        while order:
+            key, var = heapq.heappop(order)
+            if var not in self.value and -key == self.activity[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        self.model = None
+        if not self.ok:
+            return False
+        for lit in assumptions:
+            self.new_var(abs(lit))
+        self.cancel_until(0)
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.learned += 1
+                    self.assign(learnt[0], self.attach(learnt))
+                self.bump /= 0.95
+                continue
+
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                lit = assumptions[level]
+                value = self.lit_value(lit)
+                if value is False:
+                    self.cancel_until(0)
+                    return False
+                # an assumption that already holds still gets its own level
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.assign(lit, None)
+                continue
+
+            var = self.pick_branch()
+            if var is None:
+                self.model = dict(self.value)
+                self.cancel_until(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.assign(var if self.phase[var] else -var, None)
@@ -0,0 +1,214 @@
+"""
+Shared search routines for the homework 1 puzzles.
+
+A problem exposes `start`, `is_goal(state)` and `successors(state)`, which
+yields (move, state) pairs. A* also uses `heuristic(state)`, and bidirectional
+BFS needs `goal` plus `predecessors(state)`, which yields (move, previous)
+pairs where applying move to previous gives state.
+
+States are stored under `encode(state)` in the visited table and frontier and
+turned back with `decode(key)`, so callers can plug in a compact key such as an
+int. Every search returns the list of moves or None.
+
+The SearchStats passed in is updated while the search runs, so another thread
+can watch its counters and call cancel(), which makes the search raise
+SearchCancelled at its next expansion.
+"""
+
+import heapq
+import itertools
+import sys
+from collections import deque
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class SearchStats(object):
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.peak_frontier = 0
+        self.visited_bytes = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise SearchCancelled()
+
+    def record_visited(self, *tables):
+        self.visited_bytes = sum(sys.getsizeof(t) + sum(sys.getsizeof(k) for k in t) for t in tables)
+
+    def __repr__(self):
+        return (f"SearchStats(expanded={self.expanded}, generated={self.generated}, "
+                f"peak_frontier={self.peak_frontier}, visited_bytes={self.visited_bytes})")
+
+
+def identity(state):
+    return state
+
+
+def follow_parents(parent, key):
+    moves = []
+    while parent[key] is not None:
+        key, move = parent[key]
+        moves.append(move)
+    return moves[::-1]
+
+
+def bfs(problem, encode=identity, decode=identity, stats=None):
+    stats = stats if stats is not None else SearchStats()
+    start = encode(problem.start)
+    parent = {start: None}
+    queue = deque([start])
+
+    try:
+        while queue:
+            stats.peak_frontier = max(stats.peak_frontier, len(queue))
+            key = queue.popleft()
+            state = decode(key)
+            if problem.is_goal(state):
+                return follow_parents(parent, key)
+
+            stats.check()
+            stats.expanded += 1
+            for move, new_state in problem.successors(state):
+                stats.generated += 1
+                new_key = encode(new_state)
+                if new_key not in parent:
+                    parent[new_key] = (key, move)
+                    queue.append(new_key)
+
+        return None
+    finally:
+        stats.record_visited(parent)
+
+
+def bidirectional_bfs(problem, encode=identity, decode=identity, stats=None):
+    stats = stats if stats is not None else SearchStats()
+    start, goal = encode(problem.start), encode(problem.goal)
+    if start == goal:
+        return []
+
+    # the backward side stores, for each state, the next state towards the goal
+    parents = [{start: None}, {goal: None}]
+    depths = [{start: 0}, {goal: 0}]
+    frontiers = [[start], [goal]]
+    expand = [problem.successors, problem.predecessors]
+
+    try:
+        while frontiers[0] and frontiers[1]:
+            stats.peak_frontier = max(stats.peak_frontier, len(frontiers[0]) + len(frontiers[1]))
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            parent, depth = parents[side], depths[side]
+            other_depth = depths[1 - side]
+            next_frontier = []
+            meet = None
+
+            for key in frontiers[side]:
+                stats.check()
+                stats.expanded += 1
+                for move, new_state in expand[side](decode(key)):
+                    stats.generated += 1
+                    new_key = encode(new_state)
+                    if new_key not in parent:
+                        parent[new_key] = (key, move)
+                        depth[new_key] = depth[key] + 1
+                        next_frontier.append(new_key)
+                        if new_key in other_depth and (meet is None or
+                                depth[new_key] + other_depth[new_key] < depth[meet] + other_depth[meet]):
+                            meet = new_key
+            frontiers[side] = next_frontier
+
+            if meet is not None:
+                return follow_parents(parents[0], meet) + follow_parents(parents[1], meet)[::-1]
+
+        return None
+    finally:
+        stats.record_visited(parents[0], parents[1])
+
+
+def iddfs(problem, max_depth=None, encode=identity, decode=identity, stats=None):
+    stats = stats if stats is not None else SearchStats()
+    start = encode(problem.start)
+    path_keys = {start}
+    moves = []
+    cutoff = False
+
+    def dls(key, limit):
+        nonlocal cutoff
+        state = decode(key)
+        if problem.is_goal(state):
+            return True
+        if limit == 0:
+            cutoff = True
+            return False
+        stats.check()
+        stats.expanded += 1
+        for move, new_state in problem.successors(state):
+            stats.generated += 1
+            new_key = encode(new_state)
+            if new_key in path_keys:
+                continue
+            path_keys.add(new_key)
+            moves.append(move)
+            stats.peak_frontier = max(stats.peak_frontier, len(moves))
+            if dls(new_key, limit - 1):
+                return True
+            moves.pop()
+            path_keys.discard(new_key)
+        return False
+
+    try:
+        for limit in itertools.count() if max_depth is None else range(max_depth + 1):
+            cutoff = False
+            if dls(start, limit):
+                return list(moves)
+            # nothing was cut off at this depth, so a deeper pass finds nothing new
+            if not cutoff:
+                return None
+        return None
+    finally:
+        stats.record_visited(path_keys)
+
+
+def astar(problem, heuristic=None, encode=identity, decode=identity, stats=None):
+    stats = stats if stats is not None else SearchStats()
+    heuristic = heuristic or getattr(problem, "heuristic", lambda state: 0)
+    start = encode(problem.start)
+    # the counter breaks ties so keys themselves are never compared
+    counter = itertools.count()
+    parent = {start: None}
+    cost = {start: 0}
+    heap = [(heuristic(problem.start), 0, next(counter), start)]
+    closed = set()
+
+    try:
+        while heap:
+            stats.peak_frontier = max(stats.peak_frontier, len(heap))
+            _, g, _, key = heapq.heappop(heap)
+            if key in closed:
+                continue
+            state = decode(key)
+            if problem.is_goal(state):
+                return follow_parents(parent, key)
+            closed.add(key)
+
+            stats.check()
+            stats.expanded += 1
+            for move, new_state in problem.successors(state):
+                stats.generated += 1
+                new_key = encode(new_state)
+                if new_key not in closed and g + 1 < cost.get(new_key, float("inf")):
+                    cost[new_key] = g + 1
+                    parent[new_key] = (key, move)
+                    heapq.heappush(heap, (g + 1 + heuristic(new_state), g + 1, next(counter), new_key))
+
+        return None
+    finally:
+        stats.record_visited(parent)
@@ -0,0 +1,47 @@
+import random
+import unittest
+
+import homework1_rxd5484 as homework1
+
+
+def board_from_state(rows, cols, state):
+    return [[bool(state >> (row * cols + col) & 1) for col in range(cols)] for row in range(rows)]
+
+
+class LightsOutCrossCheck(unittest.TestCase):
+
+    # gf2 must find as few presses as the reference BFS, and None exactly
+    # when BFS finds the board unsolvable
+
+    def check(self, rows, cols, state):
+        board = board_from_state(rows, cols, state)
+        gf2 = homework1.LightsOutPuzzle(board).find_solution("gf2")
+        bfs = homework1.LightsOutPuzzle(board).find_solution("bfs")
+        if bfs is None:
+            self.assertIsNone(gf2, board)
+            return
+        self.assertIsNotNone(gf2, board)
+        self.assertEqual(len(gf2), len(bfs), board)
+        puzzle = homework1.LightsOutPuzzle(board)
+        for row, col in gf2:
+            puzzle.perform_move(row, col)
+        self.assertTrue(puzzle.is_solved(), board)
+
+    def test_every_small_board(self):
+        # 1x2, 2x1, 2x3 and 3x2 include unsolvable boards
+        for rows, cols in ((1, 1), (1, 2), (2, 1), (1, 3), (2, 2), (2, 3), (3, 2)):
+            for state in range(1 << (rows * cols)):
+                self.check(rows, cols, state)
+
+    def test_random_3x3_boards(self):
+        rng = random.Random(0)
+        for state in rng.sample(range(1 << 9), 20):
+            self.check(3, 3, state)
+
+    def test_unsolvable_board(self):
+        self.assertIsNone(homework1.LightsOutPuzzle([[True, False]]).find_solution("gf2"))
+        self.assertIsNone(homework1.LightsOutPuzzle([[True, False]]).find_solution("bfs"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import email
+import os
+import shutil
+import tempfile
+import unittest
+from email import iterators
+
+import homework4_rxd5484 as homework4
+
+
+def reference_tokens(email_path):
+    # the original load_tokens: a full parse, then every body line
+    tokens = []
+    with open(email_path, 'r') as file:
+        for line in iterators.body_line_iterator(email.message_from_file(file)):
+            tokens.extend(line.split())
+    return tokens
+
+
+# messages where the header scan has to agree with the email parser on where
+# the body starts and whether the message needs a full parse
+MESSAGES = {
+    "crlf": b"From: a\r\nSubject: x\r\n\r\nhello world\r\nline two\r\n",
+    "lone_cr": b"Subject: x\r\rbody\rmore words\r",
+    "no_separator": b"Subject: x\nthis is not a header line\nmore\n",
+    "headers_only": b"Subject: x\nFrom: y\n",
+    "no_headers": b"just body text\n\nmore\n",
+    "blank_first": b"\nSubject: not header\n\nbody\n",
+    "continuation_first": b" cont\nSubject: a\n\nbody4\n",
+    "empty_name": b":weird\n\nbody5\n",
+    "unix_from": b"From someone Mon Jan 1\nSubject: x\n\nbody\n",
+    "from_only": b"From x\n\nbody3\n",
+    "misplaced_from": b"Subject: a\nFrom x\n\nbody\n",
+    "misplaced_from_then_header": b"Subject: a\nFrom x\nY: z\n\nbody2\n",
+    "form_feed_header": b"Subject: a\x0cb\nX: y\n\nbody \x0c words\n",
+    "folded_tabs": b"Subject: x\n\t cont\n\n\ttabbed\x0cform\x1dsep\n",
+    "unicode_separators": b"Subject: a\xe2\x80\xa8b\n\nbody\xe2\x80\xa8six\n",
+    "next_line_header": b"Subject: a\xc2\x85b\nC: d\n\nseven\n",
+    "spaces_line": b"Subject: a\n   \n\nbody\n",
+    "long_header": b"Subject: " + b"x" * 10000 + b"\n\nbody\n",
+    "empty": b"",
+    "subject_mentions_message": b"Subject: your message/ here\n\neight nine\n",
+    "subject_mentions_multipart": b"Subject: multipart fun\n\nten\n",
+    "base64": b"Content-Type: text/plain\nContent-Transfer-Encoding: base64\n\naGVsbG8gd29ybGQ=\n",
+    "bad_content_type": b"Content-Type: garbage\n\nwords here\n",
+    "multipart": (b"Subject: x\nContent-Type: multipart/mixed;\n boundary=\"B\"\n\npre\n--B\n"
+                  b"Content-Type: text/plain\n\npart one\n--B\nContent-Type: text/html\n\n<p>two</p>\n"
+                  b"--B--\nepilogue words\n"),
+    "multipart_upper_case": b"CONTENT-TYPE: Multipart/Alternative; boundary=q\n\n--q\n\neleven\n--q--\n",
+    "multipart_no_boundary": b"Content-Type: multipart/mixed\n\nno boundary here\n",
+    "nested_multipart": (b"Content-Type: multipart/mixed; boundary=A\n\n--A\n"
+                         b"Content-Type: multipart/alternative; boundary=C\n\n--C\n\nalt one\n--C\n\nalt two\n"
+                         b"--C--\n--A\nContent-Type: message/rfc822\n\nSubject: i\n\ninner\n--A--\n"),
+    "rfc822": b"Content-Type: message/rfc822\n\nSubject: inner\n\ninner body words\n",
+    "delivery_status": b"Content-Type: message/delivery-status\n\nReporting-MTA: dns; x\n\nFinal-Recipient: a\n",
+}
+
+
+class TokenStreamCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_full_parse(self):
+        for name, data in MESSAGES.items():
+            path = os.path.join(self.dir, name)
+            with open(path, 'wb') as file:
+                file.write(data)
+            with self.subTest(name):
+                expected = reference_tokens(path)
+                self.assertEqual(homework4.load_tokens(path), expected)
+                self.assertEqual(list(homework4.iter_tokens(path)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import itertools
+import random
+import unittest
+
+import sat
+
+
+def brute_force(n, clauses, assumptions=()):
+    for bits in itertools.product([False, True], repeat=n):
+        value = lambda l: bits[abs(l) - 1] if l > 0 else not bits[abs(l) - 1]
+        if all(value(a) for a in assumptions) and all(any(value(l) for l in c) for c in clauses):
+            return True
+    return False
+
+
+class SolverCrossCheck(unittest.TestCase):
+
+    # random small CNFs, grown between calls and solved under random
+    # assumptions, against exhaustive search
+
+    def check_model(self, model, clauses, assumptions):
+        value = lambda l: model.get(abs(l), False) if l > 0 else not model.get(abs(l), False)
+        self.assertTrue(all(any(value(l) for l in c) for c in clauses))
+        self.assertTrue(all(value(a) for a in assumptions))
+
+    def test_incremental_random_cnf(self):
+        rng = random.Random(1)
+        for _ in range(1000):
+            n = rng.randint(1, 8)
+            solver = sat.Solver()
+            clauses = []
+            for _ in range(rng.randint(1, 4)):
+                for _ in range(rng.randint(0, 12)):
+                    c = [rng.choice([-1, 1]) * rng.randint(1, n) for _ in range(rng.randint(1, 4))]
+                    clauses.append(c)
+                    solver.add_clause(c)
+                assumptions = [rng.choice([-1, 1]) * rng.randint(1, n) for _ in range(rng.randint(0, 3))]
+                expected = brute_force(n, clauses, assumptions)
+                self.assertEqual(solver.solve(assumptions), expected, (n, clauses, assumptions))
+                if expected:
+                    self.check_model(solver.model, clauses, assumptions)
+                else:
+                    self.assertIsNone(solver.model)
+
+    def test_selector_guarded_clauses(self):
+        # clauses guarded by -s only apply while s is assumed
+        solver = sat.Solver()
+        solver.add_clause([1, 2])
+        solver.add_clause([-1, -3])
+        solver.add_clause([-2, -3])
+        self.assertFalse(solver.solve([3]))
+        self.assertTrue(solver.solve([-3]))
+        solver.add_clause([-4, 3])
+        self.assertFalse(solver.solve([4]))
+        solver.add_clause([-4])
+        self.assertTrue(solver.solve())
+        self.assertFalse(solver.model[4])
+
+    def test_empty_clause(self):
+        solver = sat.Solver()
+        self.assertFalse(solver.add_clause([]))
+        self.assertFalse(solver.solve())
+
+
+if __name__ == "__main__":
+    unittest.main()